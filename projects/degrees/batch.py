@@ -0,0 +1,120 @@
+import argparse
+import json
+import sys
+from multiprocessing import Pool
+
+import degrees
+import shared
+from shared import init_worker, share_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees queries, one JSON line each."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "queries", nargs="?", type=argparse.FileType("r", encoding="utf-8"),
+        default=sys.stdin,
+        help="file of tab-separated (source, target) names or ids, "
+             "one pair per line (default: stdin)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="number of worker processes (default: one per core)"
+    )
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=True)
+    graph = degrees.graph
+
+    queries = []
+    for line in args.queries:
+        line = line.rstrip("\n")
+        if line:
+            queries.append(line.split("\t"))
+
+    memory, layout = share_graph(graph)
+    try:
+        with Pool(args.workers, init_worker, (memory.name, layout)) as pool:
+            for result in pool.imap(
+                solve, [resolve_query(query) for query in queries], chunksize=64
+            ):
+                print(json.dumps(describe(graph, result)))
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def resolve_query(query):
+    """
+    Turns a (source, target) query into dense person ids, or into an
+    error result if either side cannot be resolved unambiguously.
+    """
+    if len(query) != 2:
+        return {"query": query, "error": "expected source<TAB>target"}
+    resolved = []
+    for value in query:
+        person_id = resolve_person(value)
+        if person_id is None:
+            return {"query": query, "error": f"person not found: {value}"}
+        if isinstance(person_id, list):
+            return {
+                "query": query,
+                "error": f"ambiguous name: {value}",
+                "candidates": person_id
+            }
+        resolved.append(degrees.graph.person_index[person_id])
+    return {"query": query, "pair": resolved}
+
+
+def resolve_person(value):
+    """
+    Returns the person id for an IMDB id or a unique name, a list of
+    candidate ids for an ambiguous name, or None.
+    """
+    if value in degrees.graph.person_index:
+        return value
+    person_ids = degrees.person_ids_for_name(value)
+    if len(person_ids) == 0:
+        return None
+    elif len(person_ids) > 1:
+        return person_ids
+    return person_ids[0]
+
+
+def solve(query):
+    """
+    Runs one resolved query in a worker, adding its dense path.
+    """
+    if "pair" in query:
+        source, target = query["pair"]
+        query["path"] = shared.worker_graph.bidirectional_search(source, target)
+    return query
+
+
+def describe(graph, result):
+    """
+    Converts a solved query into its JSON-ready output record.
+    """
+    source, target = (result["query"] + [None, None])[:2]
+    record = {"source": source, "target": target}
+    if "error" in result:
+        record["error"] = result["error"]
+        if "candidates" in result:
+            record["candidates"] = result["candidates"]
+        return record
+
+    path = result["path"]
+    record["connected"] = path is not None
+    if path is not None:
+        record["degrees"] = len(path)
+        record["path"] = [
+            [graph.movie_ids[movie], graph.person_ids[person]]
+            for movie, person in path
+        ]
+    return record
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmark for degrees on synthetic scale-free data.
+
+For each requested scale (number of people), generates a people /
+movies / stars dataset once, then times `degrees.load_data` and a
+fixed, seeded mix of queries for each search mode, printing one JSON
+line per scale and mode with the `util.SearchStats` counters.
+
+Cast membership is drawn with Pareto-distributed popularity weights,
+so a few people star in very many movies and most in one or two, as
+in the IMDB data. Results can be saved and later compared against to
+catch regressions:
+
+    python benchmark.py --scales 10000 100000 --save baseline.json
+    python benchmark.py --scales 10000 100000 --baseline baseline.json
+"""
+import argparse
+import csv
+import importlib
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from itertools import accumulate
+
+import degrees
+from util import SearchStats
+
+# Search modes and the `shortest_path` flags they use
+MODES = {
+    "bfs": {},
+    "bidirectional": {"bidirectional": True},
+    "astar": {"astar": True},
+}
+
+# Syllables that synthetic names are built from, so that names repeat
+# and the name index sees realistic collisions
+SYLLABLES = [
+    "al", "an", "ar", "be", "da", "el", "en", "ka", "li", "ma",
+    "mi", "na", "ne", "ra", "ro", "sa", "ta", "te", "to", "vi",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark degrees loading and searches on "
+                    "synthetic scale-free data."
+    )
+    parser.add_argument(
+        "--scales", type=int, nargs="+", default=[10000, 100000],
+        help="numbers of people to generate (default: 10^4 and 10^5)"
+    )
+    parser.add_argument(
+        "--queries", type=int, default=50,
+        help="number of queries per mode (default: 50)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--directory",
+        default=os.path.join(tempfile.gettempdir(), "degrees-benchmark"),
+        help="where generated datasets are kept between runs"
+    )
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--snapshot", action="store_true")
+    parser.add_argument(
+        "--landmarks", type=int, default=0,
+        help="landmarks to build (compact only; enables the astar mode)"
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="record peak search memory with tracemalloc (slow)"
+    )
+    parser.add_argument("--save", help="write results to a JSON file")
+    parser.add_argument(
+        "--baseline", help="compare against results saved with --save"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="relative slowdown reported as a regression (default: 0.25)"
+    )
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        directory = os.path.join(args.directory, str(scale))
+        if not os.path.exists(f"{directory}/stars.csv"):
+            generate(directory, scale, args.seed)
+        results.extend(run(
+            directory, scale, args.queries, args.seed, args.compact,
+            args.snapshot, args.landmarks, args.trace_memory
+        ))
+        for result in results[-len(MODES):]:
+            print(json.dumps(result))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for line in regressions:
+            print(line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def generate(directory, people, seed=0, movies=None, cast=4.0):
+    """
+    Writes people.csv, movies.csv and stars.csv for a synthetic
+    dataset of `people` people and `movies` movies (default: one per
+    four people). Everyone stars in at least one movie, and each movie
+    also casts about `cast` popular people.
+    """
+    rng = random.Random(seed)
+    movies = movies or max(1, people // 4)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(f"{directory}/people.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(people):
+            first = "".join(rng.choices(SYLLABLES, k=rng.randint(1, 3)))
+            last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([i, f"{first.title()} {last.title()}", birth])
+
+    with open(f"{directory}/movies.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(movies):
+            writer.writerow([i, f"Movie {i}", rng.randint(1920, 2024)])
+
+    # Heavy-tailed popularity: extra stars are drawn with Pareto
+    # weights, so the person-movie degree distribution has a power-law
+    # tail and popular people tie most movies into one component
+    weights = list(accumulate(rng.paretovariate(1.2) for _ in range(people)))
+    population = range(people)
+    with open(f"{directory}/stars.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movies):
+            size = max(1, min(int(rng.expovariate(1 / cast)) + 1, 100))
+            stars = set(rng.choices(population, cum_weights=weights, k=size))
+            stars.update(range(movie, people, movies))
+            for person in sorted(stars):
+                writer.writerow([person, movie])
+
+
+def run(directory, scale, queries, seed=0, compact=False, snapshot=False,
+        landmarks=0, trace_memory=False):
+    """
+    Loads a dataset and runs `queries` random (source, target) pairs
+    through each search mode. Returns one result dict per mode.
+    """
+    # Start from empty module state, so scales do not share data
+    importlib.reload(degrees)
+
+    start = time.perf_counter()
+    degrees.load_data(directory, compact, snapshot, landmarks)
+    load_seconds = time.perf_counter() - start
+
+    if degrees.graph is not None:
+        person_ids = degrees.graph.person_ids
+    else:
+        person_ids = list(degrees.people)
+    rng = random.Random(seed)
+    pairs = [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(queries)
+    ]
+
+    results = []
+    for mode, flags in MODES.items():
+        result = {
+            "scale": scale, "mode": mode, "compact": compact,
+            "snapshot": snapshot, "landmarks": landmarks,
+            "load_seconds": load_seconds
+        }
+        if mode == "astar" and not landmarks:
+            result["skipped"] = "no landmarks"
+            results.append(result)
+            continue
+
+        stats = SearchStats(trace_memory)
+        found = 0
+        for source, target in pairs:
+            path = degrees.shortest_path(source, target, stats=stats, **flags)
+            if path is not None:
+                found += 1
+        result.update(stats.as_dict())
+        result["found"] = found
+        result["max_rss_kb"] = resource.getrusage(
+            resource.RUSAGE_SELF
+        ).ru_maxrss
+        results.append(result)
+    return results
+
+
+def configuration(result):
+    """
+    Returns what a result is compared by: its scale and search mode,
+    and how the data was loaded.
+    """
+    return (
+        result["scale"], result["mode"], result.get("compact", False),
+        result.get("snapshot", False), result.get("landmarks", 0)
+    )
+
+
+def compare(baseline, results, tolerance):
+    """
+    Returns a message for each result whose load or search time grew by
+    more than `tolerance` relative to the baseline result with the same
+    `configuration`; results with no such baseline are not compared.
+    """
+    before = {configuration(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = before.get(configuration(result))
+        if old is None:
+            continue
+        for key in ["load_seconds", "seconds"]:
+            if key not in old or key not in result or not old[key]:
+                continue
+            change = result[key] / old[key] - 1
+            if change > tolerance:
+                regressions.append(
+                    f"{result['mode']} at {result['scale']}: {key} "
+                    f"{old[key]:.3f} -> {result[key]:.3f} "
+                    f"(+{change:.0%})"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
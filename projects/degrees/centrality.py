@@ -0,0 +1,242 @@
+"""
+Sampled betweenness and closeness centrality of people in the compact
+degrees graph.
+
+Brandes' algorithm is run from a uniform sample of source people, over
+the person-movie graph, so shortest paths are counted the way degrees
+reports them: as sequences of (movie, person) steps, with two people
+who share two movies linked twice. Source runs are split across a
+process pool that reads the graph from shared memory, and the partial
+sums are merged by the parent.
+
+Closeness is harmonic closeness (the mean of 1 / distance to everyone
+else), which stays meaningful on a graph with many components. Both
+scores are normalized to [0, 1] and estimated from the same sample;
+`error_bound` gives the Hoeffding bound on how far any estimate can be
+from its exact value.
+"""
+import argparse
+import math
+import os
+import random
+from array import array
+from multiprocessing import Pool
+
+import degrees
+import shared
+from shared import init_worker, share_graph
+
+# Source batches per worker, so that uneven batches still balance out
+BATCHES_PER_WORKER = 4
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank people by sampled betweenness and closeness."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--samples", type=int, default=100,
+        help="number of source people to sample (default: 100)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="number of worker processes (default: one per core)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=True)
+    graph = degrees.graph
+    betweenness, closeness, error = sample_centrality(
+        graph, args.samples, args.workers, args.seed
+    )
+
+    print(f"Estimates are within {error:.4f} of exact values (95%).")
+    for title, scores in [("Betweenness", betweenness),
+                          ("Closeness", closeness)]:
+        print(f"{title}:")
+        for person_id, name, score in top_people(graph, scores, args.top):
+            print(f"  {score:.4f}  {name} ({person_id})")
+
+
+def sample_centrality(graph, samples=100, workers=None, seed=0,
+                      confidence=0.95):
+    """
+    Estimates the normalized betweenness and harmonic closeness of
+    every person in a CompactGraph from `samples` random sources.
+
+    Returns (betweenness, closeness, error): two lists indexed by
+    dense person id, and the bound that every estimate is within of
+    its exact value with probability `confidence`.
+
+    `workers` processes share the source runs (default: one per core);
+    with `workers=1` they run in this process instead.
+    """
+    n = graph.person_count()
+    samples = min(samples, n)
+    sources = random.Random(seed).sample(range(n), samples)
+
+    if workers == 1:
+        graph.fold_delta()
+        betweenness, closeness = accumulate(graph, sources)
+    else:
+        betweenness = [0.0] * n
+        closeness = [0.0] * n
+        memory, layout = share_graph(graph)
+        try:
+            workers = workers or os.cpu_count() or 1
+            count = workers * BATCHES_PER_WORKER
+            batches = [sources[i::count] for i in range(count)]
+            with Pool(workers, init_worker, (memory.name, layout)) as pool:
+                for partial in pool.imap_unordered(
+                    accumulate_batch, [b for b in batches if b]
+                ):
+                    for i, value in enumerate(partial[0]):
+                        betweenness[i] += value
+                    for i, value in enumerate(partial[1]):
+                        closeness[i] += value
+        finally:
+            memory.close()
+            memory.unlink()
+
+    # Scale the sums to estimates of the normalized scores: betweenness
+    # over the (n - 1)(n - 2) ordered pairs of other people, closeness
+    # over the n - 1 other people
+    if n < 3 or samples == 0:
+        return [0.0] * n, [0.0] * n, 0.0
+    scale = n / samples
+    betweenness = [b * scale / ((n - 1) * (n - 2)) for b in betweenness]
+    closeness = [c * scale / (n - 1) for c in closeness]
+    return betweenness, closeness, error_bound(n, samples, confidence)
+
+
+def error_bound(n, samples, confidence=0.95):
+    """
+    Returns the largest error of any of the `n` sampled estimates,
+    with probability `confidence`, from Hoeffding's inequality and a
+    union bound. Each sampled source adds a term in [0, n / (n - 1)]
+    to a person's normalized score, so the error shrinks as
+    1 / sqrt(samples); sampling everyone gives exact scores.
+    """
+    if samples >= n:
+        return 0.0
+    failure = 1 - confidence
+    spread = n / (n - 1)
+    return spread * math.sqrt(math.log(2 * n / failure) / (2 * samples))
+
+
+def top_people(graph, scores, limit=10):
+    """
+    Returns up to `limit` (person_id, name, score) tuples with the
+    highest scores.
+    """
+    ranked = sorted(range(len(scores)), key=lambda p: -scores[p])[:limit]
+    return [
+        (graph.person_ids[p], graph.person_names[p], scores[p])
+        for p in ranked
+    ]
+
+
+def accumulate_batch(sources):
+    """
+    Runs `accumulate` for a batch of sources in a worker.
+    """
+    return accumulate(shared.worker_graph, sources)
+
+
+def accumulate(graph, sources):
+    """
+    Returns the unscaled betweenness and closeness sums of every
+    person over single-source runs from each of `sources`.
+    """
+    n = len(graph.person_offsets) - 1
+    m = len(graph.movie_offsets) - 1
+    betweenness = array("d", [0.0]) * n
+    closeness = array("d", [0.0]) * n
+
+    # Per-run state, reset after each run for just the entries touched
+    state = (
+        array("i", [-1]) * n, array("d", [0.0]) * n, array("d", [0.0]) * n,
+        array("i", [-1]) * m, array("d", [0.0]) * m, array("d", [0.0]) * m,
+    )
+    for source in sources:
+        single_source(graph, source, state, betweenness, closeness)
+    return betweenness, closeness
+
+
+def single_source(graph, source, state, betweenness, closeness):
+    """
+    Adds one source's Brandes dependencies to `betweenness` and the
+    inverse distances from it to `closeness`.
+    """
+    distance, sigma, delta, movie_distance, movie_sigma, movie_delta = state
+    movies_for = graph.movies_for
+    stars_for = graph.stars_for
+
+    # Level-synchronous BFS counting shortest paths; movies in
+    # `movie_levels[d]` are walked from the people at distance `d`
+    distance[source] = 0
+    sigma[source] = 1.0
+    person_levels = [[source]]
+    movie_levels = []
+    while True:
+        d = len(movie_levels)
+        level_movies = []
+        for person in person_levels[d]:
+            paths = sigma[person]
+            for movie in movies_for(person):
+                if movie_distance[movie] == -1:
+                    movie_distance[movie] = d
+                    level_movies.append(movie)
+                if movie_distance[movie] == d:
+                    movie_sigma[movie] += paths
+        if not level_movies:
+            break
+        movie_levels.append(level_movies)
+
+        next_people = []
+        for movie in level_movies:
+            paths = movie_sigma[movie]
+            for star in stars_for(movie):
+                if distance[star] == -1:
+                    distance[star] = d + 1
+                    next_people.append(star)
+                if distance[star] == d + 1:
+                    sigma[star] += paths
+        if not next_people:
+            break
+        person_levels.append(next_people)
+
+    # Accumulate dependencies from the deepest level back
+    for d in range(len(person_levels) - 1, -1, -1):
+        if d < len(movie_levels):
+            for movie in movie_levels[d]:
+                total = 0.0
+                for star in stars_for(movie):
+                    if distance[star] == d + 1:
+                        total += (1 + delta[star]) / sigma[star]
+                movie_delta[movie] = movie_sigma[movie] * total
+        for person in person_levels[d]:
+            total = 0.0
+            for movie in movies_for(person):
+                if movie_distance[movie] == d:
+                    total += movie_delta[movie] / movie_sigma[movie]
+            delta[person] = sigma[person] * total
+            if d:
+                betweenness[person] += delta[person]
+                closeness[person] += 1 / d
+
+    for level in person_levels:
+        for person in level:
+            distance[person] = -1
+            sigma[person] = delta[person] = 0.0
+    for level in movie_levels:
+        for movie in level:
+            movie_distance[movie] = -1
+            movie_sigma[movie] = movie_delta[movie] = 0.0
+
+
+if __name__ == "__main__":
+    main()
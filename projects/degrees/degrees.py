@@ -1,9 +1,16 @@
 import csv
+import os
 import sys
 
+from graph import find, load_graph, parse_year, union_all
+from ingest import load_graph_parallel
+from landmarks import bound_from, load_landmarks
+from nameindex import build_name_index
+from snapshot import read_snapshot, source_stats, write_snapshot
 from util import Node, StackFrontier, QueueFrontier
 
-# Maps names to a set of corresponding person_ids
+# Maps names to a set of corresponding person_ids (in dict mode; the
+# compact graph resolves names through its name index)
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
@@ -12,11 +19,76 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Maps movie_ids to their year as an int (0 if unknown), parsed once at
+# load for movie filters
+movie_years = {}
 
-def load_data(directory):
+# NameIndex over all lowercase names, for prefix and fuzzy lookups (and,
+# in compact mode, for finding the people with a name)
+name_index = None
+
+# Maps person_ids to the union-find root of their connected component
+# (in dict mode; the compact graph keeps its own component array)
+components = {}
+
+# CompactGraph holding people, movies and stars when loaded with
+# `compact=True`, in which case `people` and `movies` stay empty
+graph = None
+
+
+def load_data(directory, compact=False, snapshot=True, landmarks=0,
+              workers=None):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, people, movies and stars are kept in a
+    CompactGraph of dense ints and CSR arrays instead of dicts of sets.
+
+    If `snapshot` is true, the data is reloaded from the directory's
+    binary snapshot when the CSV files are unchanged since it was
+    written, and the snapshot is (re)written after parsing otherwise.
+    Reloading a snapshot is fast in compact mode only: in dict mode
+    every person and movie dict and set is still rebuilt in Python
+    (see `load_dicts`), which costs a large share of a CSV parse.
+
+    Whenever the data goes through a CompactGraph (compact mode, a
+    snapshot, or `workers`), births and years are stored as 16-bit
+    ints, so a birth or year that is not a positive number below
+    65536 reads back as "".
+
+    If `landmarks` is positive (compact mode only), also loads or builds
+    a landmark distance table with that many landmarks, saved next to
+    the snapshot, for `distance_bounds` and A* searches.
+
+    If `workers` is set, the CSV files are parsed by that many worker
+    processes (see `ingest.load_graph_parallel`).
     """
+    global graph, name_index
+    if landmarks and not compact:
+        raise Exception("landmarks require compact data")
+    if compact or snapshot or workers:
+        loaded = read_snapshot(directory) if snapshot else None
+        if loaded is None:
+            stats = source_stats(directory)
+            if workers:
+                loaded = load_graph_parallel(directory, workers)
+            else:
+                loaded = load_graph(directory)
+            if snapshot:
+                write_snapshot(directory, loaded, stats)
+
+        name_index = loaded.name_index
+
+        if compact:
+            graph = loaded
+            if landmarks:
+                graph.landmarks = load_landmarks(directory, graph, landmarks)
+        else:
+            for person, name in enumerate(loaded.person_names):
+                names.setdefault(name.lower(), set()).add(loaded.person_ids[person])
+            load_dicts(loaded)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -40,6 +112,7 @@ def load_data(directory):
                 "year": row["year"],
                 "stars": set()
             }
+            movie_years[row["id"]] = parse_year(row["year"])
 
     # Load stars
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
@@ -51,15 +124,108 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    name_index = build_name_index(names)
+
+    # Label connected components
+    for person_id in people:
+        components[person_id] = person_id
+    for movie in movies.values():
+        union_all(components, movie["stars"])
+
+
+def apply_delta(directory):
+    """
+    Applies delta CSV files from `directory` (any of people.csv,
+    movies.csv and stars.csv, with the usual headers) on top of the
+    loaded data, in time proportional to the delta.
+
+    The name map, name index and component index are updated in place.
+    In compact mode, landmark tables are dropped, since new links can
+    shorten distances.
+    """
+    people_rows = read_delta_rows(directory, "people.csv")
+    movie_rows = read_delta_rows(directory, "movies.csv")
+    star_rows = read_delta_rows(directory, "stars.csv")
+
+    if graph is not None:
+        graph.apply_delta(people_rows, movie_rows, star_rows)
+        return
+
+    added_names = []
+    for person_id, name, birth in people_rows:
+        if person_id not in people:
+            people[person_id] = {"name": name, "birth": birth, "movies": set()}
+            components[person_id] = person_id
+            names.setdefault(name.lower(), set()).add(person_id)
+            added_names.append(name)
+    for movie_id, title, year in movie_rows:
+        if movie_id not in movies:
+            movies[movie_id] = {"title": title, "year": year, "stars": set()}
+            movie_years[movie_id] = parse_year(year)
+    for person_id, movie_id in star_rows:
+        if person_id not in people or movie_id not in movies:
+            continue
+        stars = movies[movie_id]["stars"]
+        if stars:
+            union_all(components, [next(iter(stars)), person_id])
+        stars.add(person_id)
+        people[person_id]["movies"].add(movie_id)
+    if name_index is not None:
+        name_index.add(added_names)
+
+
+def read_delta_rows(directory, filename):
+    """
+    Returns the rows of a delta CSV file without its header, or an
+    empty list if the delta has no such file.
+    """
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return list(reader)
+
+
+def load_dicts(loaded):
+    """
+    Fills `people` and `movies` from a CompactGraph.
+    """
+    for movie, movie_id in enumerate(loaded.movie_ids):
+        year = loaded.movie_years[movie]
+        movies[movie_id] = {
+            "title": loaded.movie_titles[movie],
+            "year": str(year) if year else "",
+            "stars": {loaded.person_ids[p] for p in loaded.stars_for(movie)}
+        }
+        movie_years[movie_id] = year
+    for person, person_id in enumerate(loaded.person_ids):
+        birth = loaded.person_births[person]
+        people[person_id] = {
+            "name": loaded.person_names[person],
+            "birth": str(birth) if birth else "",
+            "movies": {loaded.movie_ids[m] for m in loaded.movies_for(person)}
+        }
+        components[person_id] = loaded.person_ids[loaded.components[person]]
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+
+    # Compact data reloads from its snapshot without rebuilding dicts
+    compact = "--dicts" not in args
+    if not compact:
+        args.remove("--dicts")
+    if "--compact" in args:
+        args.remove("--compact")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--dicts] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=compact)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -78,65 +244,340 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, astar=False,
+                  movie_filter=None, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is true, searches from both ends at once
+    (see `bidirectional_shortest_path`); the path found has the
+    same length either way.
+
+    If `astar` is true, runs an A* search guided by the landmark
+    distance table instead (requires data loaded with landmarks).
+
+    If `movie_filter` is a `graph.MovieFilter`, only movies it allows
+    (e.g. a year range, minus excluded movies) connect people.
+
+    If `stats` is a `util.SearchStats`, the search's counters, wall
+    time and (optionally) peak memory are added to it.
+
     If no possible path, returns None.
     """
+    if stats is not None:
+        stats.start()
+    try:
+        if graph is not None:
+            return graph.shortest_path(
+                source, target, bidirectional, astar, movie_filter, stats
+            )
+        if astar:
+            raise Exception("no landmarks loaded")
+        if find(components, source) != find(components, target):
+            return None
+        allows = movie_filter.for_movies(movie_years) if movie_filter else None
+        if bidirectional:
+            return bidirectional_shortest_path(source, target, allows, stats)
+        return breadth_first_path(source, target, allows, stats)
+    finally:
+        if stats is not None:
+            stats.stop()
+
 
+def breadth_first_path(source, target, allows=None, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, by breadth-first search
+    over movies for which `allows` (if given) is true.
+
+    If no possible path, returns None.
+    """
     frontier = QueueFrontier()
     explored = set()
+    explored_movies = set()
 
     start = Node(state=source, parent=None, action=None)
     frontier.add(start)
 
-    while True:
-        if frontier.empty():
-            return None
+    # Search counters, reported to `stats` however the search ends
+    expanded = peak = generated = 0
+    try:
+        while True:
+            if frontier.empty():
+                return None
+
+            node = frontier.remove()
+            expanded += 1
 
-        node = frontier.remove()
+            if node.state == target:
+                path = []
+                while node.parent is not None:
+                    path.append((node.action, node.state))
+                    node = node.parent
+                path.reverse()
+                return path
 
-        if node.state == target:
-            path = []
-            while node.parent is not None:
-                path.append((node.action, node.state))
-                node = node.parent
-            path.reverse()
-            return path
+            explored.add(node.state)
 
-        explored.add(node.state)
+            for action, state in unexplored_neighbors(
+                node.state, explored_movies, allows
+            ):
+                generated += 1
+                if (not frontier.contains_state(state)
+                        and state not in explored):
+                    child = Node(state=state, parent=node, action=action)
+                    frontier.add(child)
+            peak = max(peak, len(frontier.frontier))
+    finally:
+        if stats is not None:
+            stats.count(expanded, peak, generated)
 
-        for action, state in neighbors_for_person(node.state):
-            if not frontier.contains_state(state) and state not in explored:
-                child = Node(state=state, parent=node, action=action)
-                frontier.add(child)
+
+def bidirectional_shortest_path(source, target, allows=None, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one breadth-first
+    frontier from each end and always expanding the smaller one.
+
+    Only movies for which `allows` (if given) is true are used, and
+    each expanded level is counted in `stats` (if given).
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step
+    # leading back towards the side's origin (None for the origin)
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    # Movies whose casts each side has already walked
+    forward_movies = set()
+    backward_movies = set()
+
+    while forward_frontier and backward_frontier:
+
+        # Expand a whole level of the cheaper side
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward, forward_movies, allows,
+                stats
+            )
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward, backward_movies, allows,
+                stats
+            )
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
 
     # no path found
     return None
 
 
+def expand_level(frontier, parents, other_parents, explored_movies,
+                 allows=None, stats=None):
+    """
+    Expands every person in `frontier` by one step, recording new
+    people in `parents` and walked movies in `explored_movies`.
+
+    Returns the next frontier and the first person already reached
+    by the other side (or None if the searches have not met).
+    """
+    next_frontier = []
+    expanded = generated = 0
+    try:
+        for person_id in frontier:
+            expanded += 1
+            for movie_id, neighbor_id in unexplored_neighbors(
+                person_id, explored_movies, allows
+            ):
+                generated += 1
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                if neighbor_id in other_parents:
+                    return next_frontier, neighbor_id
+                next_frontier.append(neighbor_id)
+        return next_frontier, None
+    finally:
+        if stats is not None:
+            stats.count(expanded, len(next_frontier), generated)
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Stitches the source half and the target half of a bidirectional
+    search together at `meeting`.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, previous_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous_id
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, next_id = backward[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+    return path
+
+
+def all_shortest_paths(source, target, movie_filter=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using only movies allowed
+    by `movie_filter` (a `graph.MovieFilter`) if given.
+
+    A single breadth-first search records a predecessor DAG, and paths
+    are walked out of it lazily, so taking only the first few (e.g.
+    with `itertools.islice`) does not materialize all of them.
+    """
+    if graph is not None:
+        source_index = graph.person_index[source]
+        target_index = graph.person_index[target]
+        if not graph.same_component(source_index, target_index):
+            return
+        allows = movie_filter.for_graph(graph) if movie_filter else None
+        dag = shortest_path_dag(
+            source_index, target_index, graph.movies_for, graph.stars_for,
+            allows
+        )
+        if dag is None:
+            return
+        for path in dag_paths(dag, source_index, target_index):
+            yield [
+                (graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in path
+            ]
+        return
+
+    if find(components, source) != find(components, target):
+        return
+    allows = movie_filter.for_movies(movie_years) if movie_filter else None
+    dag = shortest_path_dag(
+        source, target,
+        lambda person_id: people[person_id]["movies"],
+        lambda movie_id: movies[movie_id]["stars"],
+        allows
+    )
+    if dag is not None:
+        yield from dag_paths(dag, source, target)
+
+
+def shortest_path_dag(source, target, movies_of, stars_of, allows=None):
+    """
+    Searches breadth-first from the source until the target's level is
+    complete, walking each movie's cast once and skipping movies for
+    which `allows` (if given) is false.
+
+    Returns the predecessor DAG as two dicts: the movies through which
+    each person is reached at their depth, and the people one level
+    closer to the source who starred in each movie. Returns None if
+    the target is not reachable.
+    """
+    depth = {source: 0}
+    person_movies = {source: []}
+    movie_people = {}
+    movie_depth = {}
+
+    frontier = [source]
+    level = 0
+    while frontier and target not in depth:
+        next_frontier = []
+        for person in frontier:
+            for movie in movies_of(person):
+                if allows is not None and not allows(movie):
+                    continue
+
+                # Walked already: only record another way into it
+                if movie in movie_depth:
+                    if movie_depth[movie] == level:
+                        movie_people[movie].append(person)
+                    continue
+
+                movie_depth[movie] = level
+                movie_people[movie] = [person]
+                for star in stars_of(movie):
+                    if star not in depth:
+                        depth[star] = level + 1
+                        person_movies[star] = [movie]
+                        next_frontier.append(star)
+                    elif depth[star] == level + 1:
+                        person_movies[star].append(movie)
+        frontier = next_frontier
+        level += 1
+
+    if target not in depth:
+        return None
+    return person_movies, movie_people
+
+
+def dag_paths(dag, source, person):
+    """
+    Lazily yields every path from the source to `person` in a DAG
+    built by `shortest_path_dag`.
+    """
+    if person == source:
+        yield []
+        return
+    person_movies, movie_people = dag
+    for movie in person_movies[person]:
+        for previous in movie_people[movie]:
+            for path in dag_paths(dag, source, previous):
+                yield path + [(movie, person)]
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from the landmark distance table. Either bound is None
+    when the landmarks cannot tell (a None lower bound means the two
+    are not connected).
+    """
+    if graph is None or graph.landmarks is None:
+        raise Exception("no landmarks loaded")
+    a = graph.person_index[source]
+    b = graph.person_index[target]
+    if not graph.same_component(a, b):
+        return None, None
+    return bound_from(
+        graph.landmarks.distances_to(a), graph.landmarks.distances_to(b)
+    )
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
+        suggestions = suggest_names(name)
+        if suggestions:
+            print(f"No '{name}'. Did you mean:")
+            for suggestion in suggestions:
+                print(f"  {suggestion}")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -149,11 +590,39 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns the sorted IMDB ids of everyone with a name (any case).
+    """
+    if graph is not None:
+        return sorted(
+            graph.person_ids[person]
+            for person in graph.name_index.people(name.lower())
+        )
+    return sorted(names.get(name.lower(), ()))
+
+
+def suggest_names(query, limit=5):
+    """
+    Returns up to `limit` names of people whose names start with or
+    look like `query`, best matches first.
+    """
+    if name_index is None:
+        return []
+    suggestions = []
+    for key in name_index.candidates(query, limit):
+        for person_id in person_ids_for_name(key):
+            suggestions.append(person_name(person_id))
+    return suggestions[:limit]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -162,5 +631,51 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def unexplored_neighbors(person_id, explored_movies, allows=None):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with a
+    given person in movies not yet in `explored_movies`, marking those
+    movies explored so that each cast is walked at most once per search.
+
+    Movies for which `allows` (if given) is false are skipped.
+    """
+    for movie_id in people[person_id]["movies"]:
+        if movie_id in explored_movies:
+            continue
+        explored_movies.add(movie_id)
+        if allows is not None and not allows(movie_id):
+            continue
+        for person_id in movies[movie_id]["stars"]:
+            yield movie_id, person_id
+
+
+def person_name(person_id):
+    """
+    Returns a person's name in either storage mode.
+    """
+    if graph is not None:
+        return graph.person_names[graph.person_index[person_id]]
+    return people[person_id]["name"]
+
+
+def person_birth(person_id):
+    """
+    Returns a person's birth year (or "") in either storage mode.
+    """
+    if graph is not None:
+        birth = graph.person_births[graph.person_index[person_id]]
+        return str(birth) if birth else ""
+    return people[person_id]["birth"]
+
+
+def movie_title(movie_id):
+    """
+    Returns a movie's title in either storage mode.
+    """
+    if graph is not None:
+        return graph.movie_titles[graph.movie_index[movie_id]]
+    return movies[movie_id]["title"]
+
+
 if __name__ == "__main__":
     main()
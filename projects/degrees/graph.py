@@ -0,0 +1,618 @@
+import csv
+from array import array
+from collections import deque
+
+import numpy as np
+
+from nameindex import build_name_index
+
+# Largest birth or year an array("H") can hold
+MAX_YEAR = 65535
+
+
+class CompactGraph():
+    """
+    Integer-indexed form of the degrees dataset.
+
+    People and movies are interned to dense ints, and the bipartite
+    person-movie graph is stored as two CSR (compressed sparse row)
+    structures: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    stars of movie `m` are
+    `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    Links added later by `apply_delta` are kept in small per-person and
+    per-movie overflow lists next to the CSR arrays, so updates cost
+    time proportional to the delta; `fold_delta` merges them back in.
+    """
+
+    def __init__(self):
+
+        # Dense index <-> IMDB id
+        self.person_ids = []
+        self.person_index = {}
+        self.movie_ids = []
+        self.movie_index = {}
+
+        # Attributes, indexed by dense id (0 means unknown year)
+        self.person_names = []
+        self.person_births = array("H")
+        self.movie_titles = []
+        self.movie_years = array("H")
+
+        # CSR adjacency in both directions
+        self.person_offsets = array("I", [0])
+        self.person_movies = array("I")
+        self.movie_offsets = array("I", [0])
+        self.movie_stars = array("I")
+
+        # Links added since the CSR arrays were built, as
+        # person -> list of movies and movie -> list of people
+        self.added_movies = {}
+        self.added_stars = {}
+
+        # Connected component of each person, as a flattened union-find
+        # parent array (so `components[p]` is the component's root),
+        # plus union-find links between roots added since it was built
+        self.components = array("I")
+        self.component_links = {}
+
+        # NameIndex for prefix and fuzzy name lookups
+        self.name_index = None
+
+        # Optional LandmarkIndex used by A* searches
+        self.landmarks = None
+
+    def add_person(self, person_id, name, birth):
+        self.person_index[person_id] = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(parse_year(birth))
+
+    def add_movie(self, movie_id, title, year):
+        self.movie_index[movie_id] = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(parse_year(year))
+
+    def add_people(self, person_ids, names, births):
+        """
+        Appends a block of people, given as parallel columns with
+        births already parsed (e.g. an array("H")).
+        """
+        start = len(self.person_ids)
+        self.person_index.update(
+            zip(person_ids, range(start, start + len(person_ids)))
+        )
+        self.person_ids.extend(person_ids)
+        self.person_names.extend(names)
+        self.person_births.extend(births)
+
+    def add_movies(self, movie_ids, titles, years):
+        """
+        Appends a block of movies, given as parallel columns with
+        years already parsed (e.g. an array("H")).
+        """
+        start = len(self.movie_ids)
+        self.movie_index.update(
+            zip(movie_ids, range(start, start + len(movie_ids)))
+        )
+        self.movie_ids.extend(movie_ids)
+        self.movie_titles.extend(titles)
+        self.movie_years.extend(years)
+
+    def set_stars(self, star_people, star_movies):
+        """
+        Builds both CSR structures from parallel arrays of
+        (person, movie) dense ids. Duplicate links are dropped, and
+        the component index is rebuilt to match the new links.
+        """
+        self.person_offsets, self.person_movies = build_csr(
+            len(self.person_ids), star_people, star_movies
+        )
+        self.movie_offsets, self.movie_stars = build_csr(
+            len(self.movie_ids), star_movies, star_people
+        )
+        self.added_movies = {}
+        self.added_stars = {}
+        self.label_components()
+
+    def add_star(self, person, movie):
+        """
+        Adds one (person, movie) link without rebuilding the CSR
+        arrays, merging the person's component with the movie's cast.
+        Returns False if the link already exists.
+        """
+        if movie in self.movies_for(person):
+            return False
+        stars = self.stars_for(movie)
+        if len(stars) > 0:
+            self.union_components(person, stars[0])
+        self.added_movies.setdefault(person, []).append(movie)
+        self.added_stars.setdefault(movie, []).append(person)
+        return True
+
+    def apply_delta(self, people_rows, movie_rows, star_rows):
+        """
+        Adds new people, movies and (person_id, movie_id) links, given
+        as CSV rows, in time proportional to the number of rows. Rows
+        for known ids and links to unknown ids are skipped.
+
+        Landmark tables are dropped, since new links can shorten
+        distances and make their bounds wrong.
+        """
+        # Snapshot arrays are read-only views; attributes need appending
+        if not isinstance(self.person_births, array):
+            self.person_births = array("H", self.person_births)
+        if not isinstance(self.movie_years, array):
+            self.movie_years = array("H", self.movie_years)
+
+        added_names = []
+        added_people = []
+        for person_id, name, birth in people_rows:
+            if person_id not in self.person_index:
+                self.add_person(person_id, name, birth)
+                added_names.append(name)
+                added_people.append(self.person_index[person_id])
+        for movie_id, title, year in movie_rows:
+            if movie_id not in self.movie_index:
+                self.add_movie(movie_id, title, year)
+        for person_id, movie_id in star_rows:
+            person = self.person_index.get(person_id)
+            movie = self.movie_index.get(movie_id)
+            if person is not None and movie is not None:
+                self.add_star(person, movie)
+
+        if self.name_index is not None:
+            self.name_index.add(added_names, added_people)
+        self.landmarks = None
+
+    def fold_delta(self):
+        """
+        Rebuilds the CSR arrays (and component index) to include all
+        links added since they were last built.
+        """
+        if not self.added_movies:
+            return
+        star_people = array("I")
+        star_movies = array("I")
+        for person in range(self.person_count()):
+            for movie in self.movies_for(person):
+                star_people.append(person)
+                star_movies.append(movie)
+        self.set_stars(star_people, star_movies)
+
+    def label_components(self):
+        """
+        Labels each person with their connected component, rooted at
+        its lowest dense id, from the components of the person-movie
+        graph.
+        """
+        from scipy.sparse import coo_matrix, csgraph
+
+        people = self.person_count()
+        offsets = np.frombuffer(self.person_offsets, dtype=np.uint32)
+        movies = np.frombuffer(self.person_movies, dtype=np.uint32)
+
+        # People are nodes 0..people - 1 and movies follow them
+        rows = np.repeat(np.arange(people), np.diff(offsets))
+        size = people + self.movie_count()
+        links = coo_matrix(
+            (np.ones(len(rows), dtype=bool), (rows, movies.astype(np.int64) + people)),
+            shape=(size, size)
+        )
+        _, labels = csgraph.connected_components(links, directed=False)
+
+        _, first, inverse = np.unique(
+            labels[:people], return_index=True, return_inverse=True
+        )
+        self.components = uint_array(first[inverse])
+        self.component_links = {}
+
+    def component_of(self, person):
+        """
+        Returns the root of a person's connected component.
+        """
+        if person < len(self.components):
+            root = self.components[person]
+        else:
+            root = person
+        if root in self.component_links:
+            root = find(self.component_links, root)
+        return root
+
+    def union_components(self, a, b):
+        root = self.component_of(a)
+        other = self.component_of(b)
+        if root != other:
+            self.component_links.setdefault(root, root)
+            self.component_links[other] = root
+
+    def same_component(self, a, b):
+        """
+        Returns whether two dense person ids can possibly be connected.
+        """
+        if not self.components:
+            return True
+        return self.component_of(a) == self.component_of(b)
+
+    def person_count(self):
+        return max(len(self.person_offsets) - 1, len(self.person_ids))
+
+    def movie_count(self):
+        return max(len(self.movie_offsets) - 1, len(self.movie_ids))
+
+    def movies_for(self, person):
+        """
+        Returns the dense ids of the movies a person starred in.
+        """
+        if person + 1 < len(self.person_offsets):
+            movies = self.person_movies[
+                self.person_offsets[person]:self.person_offsets[person + 1]
+            ]
+        else:
+            movies = self.person_movies[0:0]
+        if person in self.added_movies:
+            return list(movies) + self.added_movies[person]
+        return movies
+
+    def stars_for(self, movie):
+        """
+        Returns the dense ids of the people who starred in a movie.
+        """
+        if movie + 1 < len(self.movie_offsets):
+            stars = self.movie_stars[
+                self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+            ]
+        else:
+            stars = self.movie_stars[0:0]
+        if movie in self.added_stars:
+            return list(stars) + self.added_stars[movie]
+        return stars
+
+    def neighbors(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for movie in self.movies_for(self.person_index[person_id]):
+            movie_id = self.movie_ids[movie]
+            for person in self.stars_for(movie):
+                neighbors.add((movie_id, self.person_ids[person]))
+        return neighbors
+
+    def shortest_path(self, source_id, target_id, bidirectional=False,
+                      astar=False, movie_filter=None, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, searching over the
+        CSR arrays with flat parent arrays instead of `Node` objects.
+
+        If `astar` is true, runs A* guided by the loaded landmarks.
+
+        If `movie_filter` is a MovieFilter, only movies it allows are
+        used, and if `stats` is a `util.SearchStats` the search's
+        counters are added to it.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        allows = movie_filter.for_graph(self) if movie_filter else None
+        if astar:
+            if self.landmarks is None:
+                raise Exception("no landmarks loaded")
+            path = self.landmarks.search(source, target, allows, stats)
+        elif bidirectional:
+            path = self.bidirectional_search(source, target, allows, stats)
+        else:
+            path = self.search(source, target, allows, stats)
+        if path is None:
+            return None
+        return [
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in path
+        ]
+
+    def search(self, source, target, allows=None, stats=None):
+        """
+        Breadth-first search between dense person ids, using only
+        movies for which `allows` (if given) is true. Returns a list
+        of dense (movie, person) pairs, or None.
+        """
+        if not self.same_component(source, target):
+            return None
+
+        parent_person = array("i", [-1]) * self.person_count()
+        parent_movie = array("i", [-1]) * self.person_count()
+        parent_person[source] = source
+        explored_movies = bytearray(self.movie_count())
+        movies_for = self.movies_for
+        stars_for = self.stars_for
+
+        queue = deque([source])
+        expanded = peak = generated = 0
+        try:
+            while queue:
+                person = queue.popleft()
+                expanded += 1
+                if person == target:
+                    return trace_path(
+                        target, source, parent_movie, parent_person
+                    )
+                for movie in movies_for(person):
+                    if explored_movies[movie]:
+                        continue
+                    explored_movies[movie] = 1
+                    if allows is not None and not allows(movie):
+                        continue
+                    stars = stars_for(movie)
+                    generated += len(stars)
+                    for star in stars:
+                        if parent_person[star] == -1:
+                            parent_person[star] = person
+                            parent_movie[star] = movie
+                            queue.append(star)
+                if len(queue) > peak:
+                    peak = len(queue)
+        finally:
+            if stats is not None:
+                stats.count(expanded, peak, generated)
+
+        # no path found
+        return None
+
+    def bidirectional_search(self, source, target, allows=None, stats=None):
+        """
+        Breadth-first search from both ends at once, always expanding
+        the smaller frontier and using only movies for which `allows`
+        (if given) is true. Returns a list of dense (movie, person)
+        pairs, or None.
+        """
+        if source == target:
+            return []
+        if not self.same_component(source, target):
+            return None
+
+        n = self.person_count()
+        m = self.movie_count()
+
+        # Parent movies, parent people and explored movies for each side
+        forward = (array("i", [-1]) * n, array("i", [-1]) * n, bytearray(m))
+        backward = (array("i", [-1]) * n, array("i", [-1]) * n, bytearray(m))
+        forward[1][source] = source
+        backward[1][target] = target
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_level(
+                    forward_frontier, forward, backward, allows, stats
+                )
+            else:
+                backward_frontier, meeting = self.expand_level(
+                    backward_frontier, backward, forward, allows, stats
+                )
+
+            if meeting is not None:
+                path = trace_path(meeting, source, forward[0], forward[1])
+                person = meeting
+                while person != target:
+                    movie, person = backward[0][person], backward[1][person]
+                    path.append((movie, person))
+                return path
+
+        # no path found
+        return None
+
+    def expand_level(self, frontier, parents, other_parents, allows=None,
+                     stats=None):
+        """
+        Expands every person in `frontier` by one step. Returns the next
+        frontier and the first person already reached by the other
+        side (or None if the searches have not met).
+        """
+        parent_movie, parent_person, explored_movies = parents
+        other_person = other_parents[1]
+        movies_for = self.movies_for
+        stars_for = self.stars_for
+
+        next_frontier = []
+        expanded = generated = 0
+        try:
+            for person in frontier:
+                expanded += 1
+                for movie in movies_for(person):
+                    if explored_movies[movie]:
+                        continue
+                    explored_movies[movie] = 1
+                    if allows is not None and not allows(movie):
+                        continue
+                    stars = stars_for(movie)
+                    generated += len(stars)
+                    for star in stars:
+                        if parent_person[star] != -1:
+                            continue
+                        parent_person[star] = person
+                        parent_movie[star] = movie
+                        if other_person[star] != -1:
+                            return next_frontier, star
+                        next_frontier.append(star)
+            return next_frontier, None
+        finally:
+            if stats is not None:
+                stats.count(expanded, len(next_frontier), generated)
+
+
+class MovieFilter():
+    """
+    Restricts a search to movies released within a year range and not
+    explicitly excluded. Movies with an unknown year fail any year bound.
+    """
+
+    def __init__(self, min_year=None, max_year=None, exclude=()):
+        self.min_year = min_year
+        self.max_year = max_year
+
+        # Excluded movie_ids
+        self.exclude = set(exclude)
+
+    def for_graph(self, graph):
+        """
+        Returns a predicate over dense movie ids that reads years
+        straight from `graph.movie_years`.
+        """
+        years = graph.movie_years
+        excluded = {
+            graph.movie_index[movie_id] for movie_id in self.exclude
+            if movie_id in graph.movie_index
+        }
+        return self.predicate(lambda movie: years[movie], excluded)
+
+    def for_movies(self, years):
+        """
+        Returns a predicate over movie_ids that reads years from a dict
+        of movie_id to int year (0 if unknown), as kept in
+        `degrees.movie_years`.
+        """
+        return self.predicate(lambda movie_id: years[movie_id], self.exclude)
+
+    def predicate(self, year_of, excluded):
+        low = self.min_year
+        high = self.max_year
+        if low is None and high is None:
+            if not excluded:
+                return None
+            return lambda movie: movie not in excluded
+
+        low = 1 if low is None else low
+        high = 0xFFFF if high is None else high
+
+        def allows(movie):
+            return low <= year_of(movie) <= high and movie not in excluded
+        return allows
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a CompactGraph.
+    """
+    graph = CompactGraph()
+
+    # Load people
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for person_id, name, birth in reader:
+            graph.add_person(person_id, name, birth)
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for movie_id, title, year in reader:
+            graph.add_movie(movie_id, title, year)
+
+    # Load stars
+    star_people = array("I")
+    star_movies = array("I")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for person_id, movie_id in reader:
+            person = graph.person_index.get(person_id)
+            movie = graph.movie_index.get(movie_id)
+            if person is not None and movie is not None:
+                star_people.append(person)
+                star_movies.append(movie)
+    graph.set_stars(star_people, star_movies)
+
+    graph.name_index = build_name_index(
+        graph.person_names, range(len(graph.person_names))
+    )
+    return graph
+
+
+def build_csr(count, keys, values):
+    """
+    Groups `values` by `keys` (parallel arrays of dense ids below
+    `count`) into CSR offsets and indices, with each row sorted and
+    free of duplicates.
+    """
+    # Sort the links as (key, value) pairs packed into one int,
+    # dropping duplicates
+    keys = np.asarray(keys, dtype=np.uint64)
+    values = np.asarray(values, dtype=np.uint64)
+    links = np.sort(keys << np.uint64(32) | values)
+    if len(links) > 1:
+        links = links[np.append(True, links[1:] != links[:-1])]
+
+    rows = np.bincount((links >> np.uint64(32)).astype(np.int64), minlength=count)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(rows, out=offsets[1:])
+    indices = (links & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    return uint_array(offsets), uint_array(indices)
+
+
+def uint_array(values):
+    """
+    Copies a NumPy array of ids into an array("I").
+    """
+    result = array("I")
+    result.frombytes(values.astype(np.uint32).tobytes())
+    return result
+
+
+def find(parents, x):
+    """
+    Returns the root of `x` in a union-find parent mapping (an array
+    or a dict), compressing the path it walks.
+    """
+    root = x
+    while parents[root] != root:
+        root = parents[root]
+    while parents[x] != root:
+        parents[x], x = root, parents[x]
+    return root
+
+
+def union_all(parents, members):
+    """
+    Merges the union-find sets of all `members` into one.
+    """
+    members = iter(members)
+    first = next(members, None)
+    if first is None:
+        return
+    root = find(parents, first)
+    for member in members:
+        other = find(parents, member)
+        if other != root:
+            parents[other] = root
+
+
+def trace_path(person, source, parent_movie, parent_person):
+    """
+    Follows parent arrays from `person` back to `source`, returning
+    the dense (movie, person) steps in source-to-person order.
+    """
+    path = []
+    while person != source:
+        path.append((parent_movie[person], person))
+        person = parent_person[person]
+    path.reverse()
+    return path
+
+
+def parse_year(value):
+    """
+    Returns a year field as an int, or 0 if it is missing, not a number
+    or outside 1..MAX_YEAR, the range births and years are stored in.
+    """
+    try:
+        year = int(value)
+    except ValueError:
+        return 0
+    return year if 0 < year <= MAX_YEAR else 0
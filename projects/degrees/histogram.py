@@ -0,0 +1,82 @@
+"""
+Single-source distance distributions ("Bacon numbers") over the compact
+degrees graph, computed as level-synchronous BFS with sparse
+matrix-vector products on the person-movie incidence matrix.
+
+Requires NumPy and SciPy (see requirements.txt).
+"""
+import numpy as np
+from scipy import sparse
+
+
+def incidence_matrix(graph):
+    """
+    Returns the boolean people x movies incidence matrix of a
+    CompactGraph, sharing its CSR arrays rather than copying them.
+    Links added by a delta since the arrays were built are OR-ed in.
+    """
+    # Dense ids fit in 31 bits, so the uint32 arrays can be read as int32
+    indptr = np.frombuffer(graph.person_offsets, dtype=np.int32)
+    indices = np.frombuffer(graph.person_movies, dtype=np.int32)
+    data = np.ones(len(indices), dtype=bool)
+    matrix = sparse.csr_matrix(
+        (data, indices, indptr),
+        shape=(len(indptr) - 1, len(graph.movie_offsets) - 1),
+        copy=False
+    )
+
+    shape = (graph.person_count(), graph.movie_count())
+    if not graph.added_movies and matrix.shape == shape:
+        return matrix
+    matrix.resize(shape)
+    rows = [p for p, movies in graph.added_movies.items() for _ in movies]
+    cols = [m for movies in graph.added_movies.values() for m in movies]
+    added = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, cols)), shape=shape
+    )
+    return matrix + added
+
+
+def degree_histogram(graph, person_id, distances=False, matrix=None):
+    """
+    Returns a list whose element `d` is the number of people at
+    exactly `d` degrees of separation from a person (element 0 is the
+    person themself).
+
+    If `distances` is true, also returns an int16 array of every
+    person's distance, with -1 for people who are not connected.
+
+    Pass `matrix` from `incidence_matrix` to reuse it across calls.
+    """
+    if matrix is None:
+        matrix = incidence_matrix(graph)
+    transposed = matrix.T
+
+    source = graph.person_index[person_id]
+    visited = np.zeros(graph.person_count(), dtype=bool)
+    visited[source] = True
+    explored_movies = np.zeros(graph.movie_count(), dtype=bool)
+    if distances:
+        distance = np.full(graph.person_count(), -1, dtype=np.int16)
+        distance[source] = 0
+
+    counts = [1]
+    frontier = visited.copy()
+    while True:
+
+        # Movies of the frontier not walked before, then their new stars
+        movies = (transposed @ frontier) & ~explored_movies
+        explored_movies |= movies
+        frontier = (matrix @ movies) & ~visited
+        found = int(np.count_nonzero(frontier))
+        if found == 0:
+            break
+
+        visited |= frontier
+        if distances:
+            distance[frontier] = len(counts)
+        counts.append(found)
+
+    if distances:
+        return counts, distance
+    return counts
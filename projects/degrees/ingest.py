@@ -0,0 +1,143 @@
+"""
+Parallel CSV ingestion for the degrees dataset.
+
+Each CSV file is split into byte ranges that start and end on line
+boundaries, and the ranges are parsed by a process pool with the plain
+tuple-based `csv.reader`. People and movies are interned in file order
+by the parent process, so dense ids match a sequential load, but the
+workers send them back as whole columns (ids, names, and births or
+years already parsed into arrays) that are appended a block at a time.
+Star rows are mapped to dense ids by the workers, which inherit the id
+maps and send back compact arrays.
+
+The trigrams of the name index are found by the same pool, a slice of
+the sorted names per task. The parent still sorts the names, merges the
+posting lists and builds the CSR arrays and component labels, the last
+two with NumPy and SciPy rather than per-element Python loops.
+
+Records must not contain embedded newlines (true of the IMDB exports),
+since ranges are cut at raw newline bytes.
+"""
+import csv
+import io
+import os
+from array import array
+from multiprocessing import Pool
+
+from graph import CompactGraph, parse_year
+from nameindex import build_name_index
+
+# Ranges per worker, so that uneven ranges still balance out
+RANGES_PER_WORKER = 4
+
+# Id maps for star workers, set by `init_star_worker`
+worker_person_index = None
+worker_movie_index = None
+
+
+def line_ranges(path, parts):
+    """
+    Splits a CSV file, after its header line, into up to `parts`
+    (start, end) byte ranges that each begin at the start of a line.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        bounds = [start]
+        for i in range(1, parts):
+            f.seek(start + (size - start) * i // parts)
+            f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    if size > bounds[-1]:
+        bounds.append(size)
+    return [(path, a, b) for a, b in zip(bounds, bounds[1:])]
+
+
+def read_range(task):
+    """
+    Returns the CSV rows in one byte range of a file.
+    """
+    path, start, end = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return list(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+
+
+def read_columns(task):
+    """
+    Returns the (id, name or title, year) rows in one byte range as
+    three columns: a list of ids, a list of names and an array of
+    parsed years.
+    """
+    rows = read_range(task)
+    ids = [row[0] for row in rows]
+    names = [row[1] for row in rows]
+    years = array("H", [parse_year(row[2]) for row in rows])
+    return ids, names, years
+
+
+def init_star_worker(person_index, movie_index):
+    global worker_person_index, worker_movie_index
+    worker_person_index = person_index
+    worker_movie_index = movie_index
+
+
+def read_star_range(task):
+    """
+    Returns the (person, movie) dense ids of the star rows in one byte
+    range, as two parallel arrays, skipping rows with unknown ids.
+    """
+    star_people = array("I")
+    star_movies = array("I")
+    for person_id, movie_id in read_range(task):
+        person = worker_person_index.get(person_id)
+        movie = worker_movie_index.get(movie_id)
+        if person is not None and movie is not None:
+            star_people.append(person)
+            star_movies.append(movie)
+    return star_people, star_movies
+
+
+def load_graph_parallel(directory, workers=None):
+    """
+    Load data from CSV files into a CompactGraph using a pool of
+    `workers` processes (default: one per core).
+    """
+    workers = workers or os.cpu_count() or 1
+    parts = workers * RANGES_PER_WORKER
+    graph = CompactGraph()
+
+    with Pool(workers) as pool:
+
+        # Load people
+        tasks = line_ranges(f"{directory}/people.csv", parts)
+        for columns in pool.imap(read_columns, tasks):
+            graph.add_people(*columns)
+
+        # Load movies
+        tasks = line_ranges(f"{directory}/movies.csv", parts)
+        for columns in pool.imap(read_columns, tasks):
+            graph.add_movies(*columns)
+
+    # Load stars, in a new pool that starts with the finished id maps
+    star_people = array("I")
+    star_movies = array("I")
+    initargs = (graph.person_index, graph.movie_index)
+    with Pool(workers, init_star_worker, initargs) as pool:
+        tasks = line_ranges(f"{directory}/stars.csv", parts)
+        for people_part, movies_part in pool.imap(read_star_range, tasks):
+            star_people.extend(people_part)
+            star_movies.extend(movies_part)
+
+        # Find the trigrams of names in the same pool
+        graph.name_index = build_name_index(
+            graph.person_names, range(len(graph.person_names)), pool, parts
+        )
+    graph.set_stars(star_people, star_movies)
+    return graph
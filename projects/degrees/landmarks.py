@@ -0,0 +1,241 @@
+"""
+Landmark (ALT) distance oracle for the compact degrees graph.
+
+BFS distances from a few landmark people give, by the triangle
+inequality, a lower bound of max |d(L, a) - d(L, b)| and an upper bound
+of min d(L, a) + d(L, b) on the distance between any two people. The
+lower bound is also a consistent heuristic for A* search.
+"""
+import heapq
+import os
+from array import array
+
+from snapshot import read_sections, source_stats, write_sections
+
+# Bumped whenever the file layout changes, so old tables are rebuilt
+VERSION = 1
+
+# Stored distance for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+
+        # Dense person ids of the landmarks
+        self.landmarks = landmarks
+
+        # Distance from landmark `i` to person `p` at
+        # `distances[i * person_count + p]`, UNREACHABLE if none
+        self.distances = distances
+
+    def distances_to(self, person):
+        """
+        Returns the list of landmark distances for one person.
+        """
+        n = self.graph.person_count()
+        return [
+            self.distances[i * n + person] for i in range(len(self.landmarks))
+        ]
+
+    def lower_bound(self, a, b):
+        """
+        Returns a lower bound on the distance between two dense person
+        ids, or None if some landmark proves they are not connected.
+        """
+        return bound_from(self.distances_to(a), self.distances_to(b))[0]
+
+    def upper_bound(self, a, b):
+        """
+        Returns an upper bound on the distance between two dense person
+        ids, or None if no landmark reaches both of them.
+        """
+        return bound_from(self.distances_to(a), self.distances_to(b))[1]
+
+    def search(self, source, target, allows=None, stats=None):
+        """
+        A* search between dense person ids, guided by the landmark
+        lower bound and using only movies for which `allows` (if given)
+        is true. Returns a list of dense (movie, person) pairs, or None,
+        adding the search's counters to `stats` (if given).
+
+        Filtering only removes links, so the bounds stay admissible.
+        """
+        graph = self.graph
+        if not graph.same_component(source, target):
+            return None
+
+        n = graph.person_count()
+        k = len(self.landmarks)
+        distances = self.distances
+        goal = self.distances_to(target)
+
+        def heuristic(person):
+            h = 0
+            for i in range(k):
+                d = distances[i * n + person]
+                if d != UNREACHABLE and goal[i] != UNREACHABLE:
+                    h = max(h, abs(d - goal[i]))
+            return h
+
+        cost = array("i", [-1]) * n
+        parent_person = array("i", [-1]) * n
+        parent_movie = array("i", [-1]) * n
+        closed = bytearray(n)
+
+        # Cheapest cost at which each movie's cast has been walked;
+        # expansion is by f rather than g, so a later visit may be cheaper
+        movie_cost = array("i", [-1]) * graph.movie_count()
+
+        movies_for = graph.movies_for
+        stars_for = graph.stars_for
+
+        cost[source] = 0
+        parent_person[source] = source
+        heap = [(heuristic(source), 0, source)]
+        expanded = peak = generated = 0
+        try:
+            while heap:
+                person = heapq.heappop(heap)[2]
+                if closed[person]:
+                    continue
+                g = cost[person]
+                expanded += 1
+                if person == target:
+                    path = []
+                    while person != source:
+                        path.append((parent_movie[person], person))
+                        person = parent_person[person]
+                    path.reverse()
+                    return path
+                closed[person] = 1
+
+                for movie in movies_for(person):
+                    if movie_cost[movie] != -1 and movie_cost[movie] <= g:
+                        continue
+                    movie_cost[movie] = g
+                    if allows is not None and not allows(movie):
+                        continue
+                    stars = stars_for(movie)
+                    generated += len(stars)
+                    for star in stars:
+                        if cost[star] == -1 or g + 1 < cost[star]:
+                            cost[star] = g + 1
+                            parent_person[star] = person
+                            parent_movie[star] = movie
+
+                            # Break ties towards deeper nodes
+                            f = g + 1 + heuristic(star)
+                            heapq.heappush(heap, (f, -(g + 1), star))
+                if len(heap) > peak:
+                    peak = len(heap)
+        finally:
+            if stats is not None:
+                stats.count(expanded, peak, generated)
+
+        # no path found
+        return None
+
+
+def bound_from(a, b):
+    """
+    Returns (lower, upper) distance bounds from two lists of
+    landmark distances.
+    """
+    lower = 0
+    upper = None
+    for da, db in zip(a, b):
+        if da == UNREACHABLE and db == UNREACHABLE:
+            continue
+        if da == UNREACHABLE or db == UNREACHABLE:
+            return None, None
+        lower = max(lower, abs(da - db))
+        if upper is None or da + db < upper:
+            upper = da + db
+    return lower, upper
+
+
+def distances_from(graph, source):
+    """
+    Returns an array of BFS distances from `source` to every person,
+    with UNREACHABLE for people in other components.
+    """
+    distances = array("B", [UNREACHABLE]) * graph.person_count()
+    explored_movies = bytearray(graph.movie_count())
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth = min(depth + 1, UNREACHABLE - 1)
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_for(person):
+                if explored_movies[movie]:
+                    continue
+                explored_movies[movie] = 1
+                for star in graph.stars_for(movie):
+                    if distances[star] == UNREACHABLE:
+                        distances[star] = depth
+                        next_frontier.append(star)
+        frontier = next_frontier
+    return distances
+
+
+def build_landmarks(graph, k):
+    """
+    Picks up to `k` landmarks and computes their distance tables.
+
+    The first landmark is the person with the most movies; each later
+    one is the person farthest from every landmark chosen so far.
+    """
+    n = graph.person_count()
+    landmarks = array("I")
+    distances = array("B")
+    if n == 0:
+        return LandmarkIndex(graph, landmarks, distances)
+
+    offsets = graph.person_offsets
+    landmark = max(range(n), key=lambda p: offsets[p + 1] - offsets[p])
+    nearest = array("B", [UNREACHABLE]) * n
+    while len(landmarks) < k:
+        table = distances_from(graph, landmark)
+        landmarks.append(landmark)
+        distances.extend(table)
+        for person in range(n):
+            if table[person] < nearest[person]:
+                nearest[person] = table[person]
+
+        # Farthest reachable person from the current landmarks
+        landmark = max(
+            range(n),
+            key=lambda p: nearest[p] if nearest[p] != UNREACHABLE else -1
+        )
+        if nearest[landmark] in (0, UNREACHABLE):
+            break
+
+    return LandmarkIndex(graph, landmarks, distances)
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, "degrees.landmarks")
+
+
+def load_landmarks(directory, graph, k):
+    """
+    Returns the LandmarkIndex saved in the directory for `k` landmarks,
+    building and saving it first if it is missing or stale.
+    """
+    stats = source_stats(directory)
+    path = landmarks_path(directory)
+    loaded = read_sections(path, VERSION, stats)
+    if loaded is not None and loaded[0] == {"k": k}:
+        sections = loaded[1]
+        return LandmarkIndex(graph, sections["landmarks"], sections["distances"])
+
+    index = build_landmarks(graph, k)
+    write_sections(path, VERSION, stats, {
+        "landmarks": index.landmarks,
+        "distances": index.distances,
+    }, meta={"k": k})
+    return index
@@ -0,0 +1,266 @@
+"""
+Prefix and fuzzy lookup of lowercase person names.
+
+Names are kept in one sorted list, so prefixes are found with bisect.
+Fuzzy matches come from a character trigram index stored as CSR
+arrays: the posting lists of the query's trigrams are counted to find
+how many trigrams each name shares with it, and names are ranked by
+Dice similarity of the trigram sets. Only the rarest trigrams' posting
+lists can hold candidates (prefix filtering), since a name similar
+enough to the query must contain one of them. Counting runs in NumPy
+over a scratch array of one count per name.
+
+An index built with the dense person id of each name also maps each
+name to its people, as another CSR pair, so that the compact graph can
+resolve names without a dict of sets of string ids.
+"""
+import math
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+# Smallest trigram similarity a fuzzy candidate must reach
+MIN_SIMILARITY = 0.4
+
+
+class NameIndex():
+    def __init__(self, keys, key_grams, grams, gram_offsets, gram_keys,
+                 key_offsets=None, key_people=None):
+
+        # Sorted, unique lowercase names, and how many distinct
+        # trigrams each one has
+        self.keys = keys
+        self.key_grams = key_grams
+
+        # Sorted trigrams; the keys containing `grams[g]` are
+        # `gram_keys[gram_offsets[g]:gram_offsets[g + 1]]`
+        self.grams = grams
+        self.gram_offsets = gram_offsets
+        self.gram_keys = gram_keys
+
+        # If built with people, the dense person ids named `keys[k]` are
+        # `key_people[key_offsets[k]:key_offsets[k + 1]]`
+        self.key_offsets = key_offsets
+        self.key_people = key_people
+
+        # Small NameIndex of names added after this one was built, and
+        # the people of added names
+        self.extra = None
+        self.extra_people = {}
+
+        # Scratch trigram counts for fuzzy(), one per key, made on first use
+        self.counts = None
+
+    def __contains__(self, key):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return True
+        return self.extra is not None and key in self.extra
+
+    def add(self, names, people=None):
+        """
+        Adds names to the index, with the dense person id of each one if
+        given. New names go into a secondary index that is rebuilt from
+        the added names only, so the cost grows with the names added
+        rather than with the whole index.
+        """
+        added = set(self.extra.keys) if self.extra is not None else set()
+        for i, name in enumerate(names):
+            key = name.lower()
+            if people is not None:
+                self.extra_people.setdefault(key, []).append(people[i])
+            if key not in self:
+                added.add(key)
+        if added:
+            self.extra = build_name_index(added)
+
+    def people(self, key):
+        """
+        Returns the dense ids of the people named `key` (lowercase), if
+        the index was built with people.
+        """
+        result = []
+        i = bisect_left(self.keys, key)
+        if (self.key_offsets is not None and i < len(self.keys)
+                and self.keys[i] == key):
+            result.extend(self.key_people[self.key_offsets[i]:self.key_offsets[i + 1]])
+        result.extend(self.extra_people.get(key, ()))
+        return result
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in
+        alphabetical order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(matches) < limit:
+            if not self.keys[i].startswith(prefix):
+                break
+            matches.append(self.keys[i])
+            i += 1
+        if self.extra is not None:
+            matches = sorted(matches + self.extra.prefix(prefix, limit))
+        return matches[:limit]
+
+    def postings(self, gram):
+        """
+        Returns the indices of the keys containing a trigram, as a NumPy
+        array viewing `gram_keys`.
+        """
+        gram_keys = np.frombuffer(self.gram_keys, dtype=np.uint32)
+        g = bisect_left(self.grams, gram)
+        if g == len(self.grams) or self.grams[g] != gram:
+            return gram_keys[0:0]
+        return gram_keys[self.gram_offsets[g]:self.gram_offsets[g + 1]]
+
+    def fuzzy(self, query, limit=10):
+        """
+        Returns up to `limit` (name, similarity) pairs for names that
+        look like `query`, most similar first.
+        """
+        query_grams = trigrams(query.lower())
+        if not query_grams:
+            return []
+
+        # A name reaching MIN_SIMILARITY shares at least `needed` of the
+        # query's trigrams (as it has at least that many of its own), so
+        # it contains one of the len(query_grams) - needed + 1 rarest
+        needed = max(1, math.ceil(
+            MIN_SIMILARITY * len(query_grams) / (2 - MIN_SIMILARITY) - 1e-9
+        ))
+        postings = sorted((self.postings(gram) for gram in query_grams), key=len)
+        rare = np.concatenate(postings[:len(postings) - needed + 1])
+
+        # Count the trigrams each name shares in a scratch array, then
+        # read back the counts of the candidates from the rare lists
+        if self.counts is None:
+            self.counts = np.zeros(len(self.keys), dtype=np.uint16)
+        try:
+            for keys in postings:
+                self.counts[keys] += 1
+            candidates = np.unique(rare[self.counts[rare] >= needed])
+            shared = self.counts[candidates].astype(np.float64)
+        finally:
+            self.counts.fill(0)
+
+        key_grams = np.frombuffer(self.key_grams, dtype=np.uint16)
+        scores = 2 * shared / (len(query_grams) + key_grams[candidates].astype(np.float64))
+        similar = scores >= MIN_SIMILARITY
+        candidates = candidates[similar]
+        scores = scores[similar]
+
+        # Keys are sorted, so ties by index are ties by name
+        best = np.lexsort((candidates, -scores))[:limit]
+        scored = [
+            (-score, self.keys[i])
+            for i, score in zip(candidates[best].tolist(), scores[best].tolist())
+        ]
+        if self.extra is not None:
+            scored.extend(
+                (-score, key) for key, score in self.extra.fuzzy(query, limit)
+            )
+        scored.sort()
+        return [(key, -score) for score, key in scored[:limit]]
+
+    def candidates(self, query, limit=10):
+        """
+        Returns up to `limit` names for a query: an exact match first,
+        then names starting with it, then similar-looking names.
+        """
+        query = query.lower()
+        matches = [query] if query in self else []
+        for key in self.prefix(query, limit + 1):
+            if key not in matches:
+                matches.append(key)
+        if len(matches) >= limit:
+            return matches[:limit]
+        for key, _ in self.fuzzy(query, limit):
+            if key not in matches:
+                matches.append(key)
+        return matches[:limit]
+
+
+def trigrams(text):
+    """
+    Returns the set of character trigrams of `text`, padded so that
+    word starts and ends count too.
+    """
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def build_name_index(names, people=None, pool=None, parts=1):
+    """
+    Builds a NameIndex over an iterable of names (any case). If
+    `people` is given, it holds the dense person id of each name, and
+    the index maps names to people too.
+
+    If `pool` (a multiprocessing Pool) is given, the trigrams of the
+    names are found by its workers, in `parts` slices of the names.
+    """
+    key_offsets = key_people = None
+    if people is None:
+        keys = sorted({name.lower() for name in names})
+    else:
+        keys = []
+        key_offsets = array("I")
+        key_people = array("I")
+        for key, person in sorted(zip((name.lower() for name in names), people)):
+            if not keys or keys[-1] != key:
+                key_offsets.append(len(key_people))
+                keys.append(key)
+            key_people.append(person)
+        key_offsets.append(len(key_people))
+
+    if pool is None:
+        slices = [key_postings((keys, 0))]
+    else:
+        step = max(1, -(-len(keys) // parts))
+        slices = pool.imap(
+            key_postings,
+            [(keys[start:start + step], start) for start in range(0, len(keys), step)]
+        )
+
+    # Slices come back in order, so joined posting lists stay sorted
+    key_grams = array("H")
+    postings = {}
+    for slice_grams, slice_postings in slices:
+        key_grams.extend(slice_grams)
+        for gram, indices in slice_postings.items():
+            if gram in postings:
+                postings[gram].extend(indices)
+            else:
+                postings[gram] = indices
+
+    grams = sorted(postings)
+    gram_offsets = array("I", [0])
+    gram_keys = array("I")
+    for gram in grams:
+        gram_keys.extend(postings[gram])
+        gram_offsets.append(len(gram_keys))
+    return NameIndex(
+        keys, key_grams, grams, gram_offsets, gram_keys, key_offsets, key_people
+    )
+
+
+def key_postings(task):
+    """
+    Returns (key_grams, postings) for a (keys, start) slice of sorted
+    keys beginning at index `start`: the number of trigrams of each key,
+    and a dict of each trigram to an array of the indices of the keys
+    containing it.
+    """
+    keys, start = task
+    key_grams = array("H")
+    postings = {}
+    for i, key in enumerate(keys, start):
+        key_trigrams = trigrams(key)
+        key_grams.append(min(len(key_trigrams), 0xFFFF))
+        for gram in key_trigrams:
+            if gram not in postings:
+                postings[gram] = array("I")
+            postings[gram].append(i)
+    return key_grams, postings
@@ -0,0 +1,62 @@
+from multiprocessing import shared_memory
+
+from graph import CompactGraph
+
+# CompactGraph arrays needed to search the graph from a worker process
+SHARED_FIELDS = [
+    "person_offsets", "person_movies",
+    "movie_offsets", "movie_stars",
+    "components",
+]
+
+# Per-process state for pool workers, set by `init_worker`
+worker_memory = None
+worker_graph = None
+
+
+def share_graph(graph):
+    """
+    Copies the CSR arrays of `graph` into one shared memory block,
+    folding in any links added by a delta first.
+
+    Returns the SharedMemory object, which the caller must close and
+    unlink when done, and a layout to pass to `attach_graph`.
+    """
+    graph.fold_delta()
+    blobs = [getattr(graph, name) for name in SHARED_FIELDS]
+    size = sum(len(blob) * blob.itemsize for blob in blobs)
+    memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+    layout = []
+    offset = 0
+    for name, blob in zip(SHARED_FIELDS, blobs):
+        data = memoryview(blob)
+        typecode = data.format
+        data = data.cast("B")
+        memory.buf[offset:offset + len(data)] = data
+        layout.append((name, typecode, offset, len(data)))
+        offset += len(data)
+    return memory, layout
+
+
+def attach_graph(name, layout):
+    """
+    Attaches to a block created by `share_graph`, returning the
+    SharedMemory object and a CompactGraph whose CSR arrays are views
+    into it. The graph has no ids or attributes, so it can only be
+    searched by dense id.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    graph = CompactGraph()
+    for field, typecode, offset, size in layout:
+        setattr(graph, field, memory.buf[offset:offset + size].cast(typecode))
+    return memory, graph
+
+
+def init_worker(name, layout):
+    """
+    Pool initializer that attaches a worker process to a block created
+    by `share_graph`, leaving the graph in `worker_graph`.
+    """
+    global worker_memory, worker_graph
+    worker_memory, worker_graph = attach_graph(name, layout)
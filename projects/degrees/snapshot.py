@@ -0,0 +1,198 @@
+"""
+Binary snapshot of a CompactGraph, so repeated runs can skip parsing
+the CSV files. Indexes derived from the graph are saved next to it in
+the same layout.
+
+Snapshot layout:
+
+    MAGIC
+    8-byte little-endian length of the JSON header
+    JSON header: version, byte order, CSV stats, extra metadata and
+        a table of sections as {name: [typecode, offset, length]}
+    sections, each aligned to ALIGNMENT bytes
+
+Array sections hold the raw machine representation of an `array` and
+are memory-mapped in place; string sections hold UTF-8 text with each
+string terminated by a NUL character.
+"""
+import json
+import mmap
+import os
+import sys
+
+from graph import CompactGraph
+from nameindex import NameIndex
+
+# Bumped whenever the layout below changes, so old snapshots are rebuilt
+VERSION = 4
+
+MAGIC = b"DEGSNAP\0"
+
+# CompactGraph attributes stored as raw arrays and as string lists
+ARRAY_FIELDS = [
+    "person_births", "movie_years",
+    "person_offsets", "person_movies",
+    "movie_offsets", "movie_stars",
+    "components",
+]
+STRING_FIELDS = ["person_ids", "person_names", "movie_ids", "movie_titles"]
+
+# NameIndex attributes, stored with a "name_" prefix
+NAME_INDEX_FIELDS = [
+    "keys", "key_grams", "grams", "gram_offsets", "gram_keys",
+    "key_offsets", "key_people",
+]
+
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Sections start on multiples of this, so arrays can be cast in place
+ALIGNMENT = 8
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def source_stats(directory):
+    """
+    Returns the size and modification time of each CSV file, which
+    decide whether a snapshot is still fresh.
+    """
+    stats = {}
+    for name in SOURCES:
+        st = os.stat(os.path.join(directory, name))
+        stats[name] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def write_snapshot(directory, graph, stats):
+    """
+    Writes `graph` to the directory's snapshot file, tagged with the
+    `source_stats` taken before the CSV files were parsed. Returns
+    False if the snapshot could not be written.
+    """
+    fields = {name: getattr(graph, name) for name in ARRAY_FIELDS + STRING_FIELDS}
+    for name in NAME_INDEX_FIELDS:
+        fields["name_" + name] = getattr(graph.name_index, name)
+    return write_sections(snapshot_path(directory), VERSION, stats, fields)
+
+
+def read_snapshot(directory):
+    """
+    Memory-maps the directory's snapshot file into a CompactGraph.
+
+    Returns None if there is no snapshot, or if it was written by a
+    different version or from CSV files that have since changed.
+    """
+    try:
+        stats = source_stats(directory)
+    except OSError:
+        return None
+    loaded = read_sections(snapshot_path(directory), VERSION, stats)
+    if loaded is None:
+        return None
+
+    sections = loaded[1]
+    graph = CompactGraph()
+    for name in ARRAY_FIELDS + STRING_FIELDS:
+        setattr(graph, name, sections[name])
+    graph.name_index = NameIndex(
+        *(sections["name_" + name] for name in NAME_INDEX_FIELDS)
+    )
+    graph.person_index = {
+        person_id: i for i, person_id in enumerate(graph.person_ids)
+    }
+    graph.movie_index = {
+        movie_id: i for i, movie_id in enumerate(graph.movie_ids)
+    }
+    return graph
+
+
+def write_sections(path, version, stats, fields, meta=None):
+    """
+    Writes a file in the snapshot layout. `fields` maps section names
+    to arrays or lists of strings; `meta` is any extra JSON-ready data
+    to keep in the header. Returns False if the file could not be
+    written.
+    """
+    sections = {}
+    chunks = []
+    offset = 0
+
+    for name, values in fields.items():
+        if isinstance(values, list):
+            typecode = "s"
+            data = "".join(value + "\0" for value in values).encode("utf-8")
+        else:
+            data = memoryview(values)
+            typecode = data.format
+            data = data.cast("B")
+
+        padding = -offset % ALIGNMENT
+        chunks.append(b"\0" * padding)
+        offset += padding
+        sections[name] = [typecode, offset, len(data)]
+        chunks.append(data)
+        offset += len(data)
+
+    header = json.dumps({
+        "version": version,
+        "byteorder": sys.byteorder,
+        "sources": stats,
+        "meta": meta,
+        "sections": sections,
+    }).encode("utf-8")
+
+    # Pad the header so the first section is aligned in the file
+    start = len(MAGIC) + 8 + len(header)
+    header += b" " * (-start % ALIGNMENT)
+
+    try:
+        with open(path + ".tmp", "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        return False
+    return True
+
+
+def read_sections(path, version, stats):
+    """
+    Memory-maps a file written by `write_sections`.
+
+    Returns its `meta` and a dict of sections (read-only memoryviews
+    for arrays, lists for strings), or None if the file is missing,
+    has another version, or was written from other CSV files.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    length = int.from_bytes(data[len(MAGIC):len(MAGIC) + 8], "little")
+    start = len(MAGIC) + 8 + length
+    try:
+        header = json.loads(data[len(MAGIC) + 8:start])
+    except ValueError:
+        return None
+    if (header.get("version") != version
+            or header.get("byteorder") != sys.byteorder
+            or header.get("sources") != stats):
+        return None
+
+    view = memoryview(data)
+    sections = {}
+    for name, (typecode, offset, size) in header["sections"].items():
+        section = view[start + offset:start + offset + size]
+        if typecode == "s":
+            sections[name] = str(section, "utf-8").split("\0")[:-1]
+        else:
+            sections[name] = section.cast(typecode)
+    return header.get("meta"), sections
@@ -1,3 +1,8 @@
+import time
+import tracemalloc
+from collections import Counter, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +12,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier for each state
+        self.states = Counter()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] += 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +30,15 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard_state(node.state)
             return node
 
+    def discard_state(self, state):
+        self.states[state] -= 1
+        if self.states[state] == 0:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +46,60 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard_state(node.state)
             return node
+
+
+class SearchStats():
+    """
+    Structured counters for one or more searches: people expanded,
+    peak frontier size, (movie, person) neighbor pairs generated, wall
+    time, and (if `trace_memory` is set) peak memory allocated while
+    searching. Memory tracing uses tracemalloc, which slows searches
+    down noticeably, so it is off by default.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.searches = 0
+        self.expanded = 0
+        self.peak_frontier = 0
+        self.generated = 0
+        self.seconds = 0.0
+        self.peak_memory = 0
+        self.started = None
+        self.tracing = False
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.trace_memory:
+            self.tracing = not tracemalloc.is_tracing()
+            if self.tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+    def stop(self):
+        self.seconds += time.perf_counter() - self.started
+        self.searches += 1
+        if self.trace_memory:
+            self.peak_memory = max(
+                self.peak_memory, tracemalloc.get_traced_memory()[1]
+            )
+            if self.tracing:
+                tracemalloc.stop()
+
+    def count(self, expanded, peak_frontier, generated):
+        self.expanded += expanded
+        self.peak_frontier = max(self.peak_frontier, peak_frontier)
+        self.generated += generated
+
+    def as_dict(self):
+        return {
+            "searches": self.searches,
+            "expanded": self.expanded,
+            "peak_frontier": self.peak_frontier,
+            "generated": self.generated,
+            "seconds": self.seconds,
+            "peak_memory": self.peak_memory,
+        }
@@ -0,0 +1,167 @@
+import sys
+
+import numpy as np
+
+# Field value of cells a wavefront has not reached
+UNREACHED = -1
+UNREACHED_MOD3 = 255
+
+
+class GridMaze():
+    """
+    Maze stored as a NumPy array of walls, one byte per cell, for mazes
+    far too large for the lists of bools used by Maze.
+
+    Searches run as a breadth-first wavefront: each step takes the whole
+    frontier as an array of cell indices, steps it in all four directions
+    at once and keeps the open cells not reached before, recording the
+    step number in a distance field. The path is read back by walking
+    down the field from the goal.
+    """
+
+    def __init__(self, filename):
+
+        # Read the file as raw bytes, without line endings
+        data = np.fromfile(filename, dtype=np.uint8)
+        if np.any(data == ord("\r")):
+            data = data[data != ord("\r")]
+
+        # Validate start and goal
+        if np.count_nonzero(data == ord("A")) != 1:
+            raise Exception("maze must have exactly one start point")
+        if np.count_nonzero(data == ord("B")) != 1:
+            raise Exception("maze must have exactly one goal")
+
+        # Determine height and width of maze
+        ends = np.flatnonzero(data == ord("\n"))
+        if len(ends) == 0 or ends[-1] != len(data) - 1:
+            ends = np.append(ends, len(data))
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        lengths = ends - starts
+        self.height = len(lengths)
+        self.width = int(lengths.max())
+
+        # Walls, with a border of walls around the maze so that stepping
+        # off an edge needs no bounds checks; cells past the end of a
+        # short line are open, as in Maze
+        self.padded = np.ones((self.height + 2, self.width + 2), dtype=bool)
+        self.walls = self.padded[1:-1, 1:-1]
+        if np.all(lengths == self.width):
+            rows = data[:self.height * (self.width + 1)]
+            if len(rows) < self.height * (self.width + 1):
+                rows = np.append(rows, ord("\n"))
+            grid = rows.reshape(self.height, self.width + 1)[:, :self.width]
+            self.walls[:] = ~(
+                (grid == ord(" ")) | (grid == ord("A")) | (grid == ord("B"))
+            )
+        else:
+            self.walls[:] = False
+            for i, (start, end) in enumerate(zip(starts, ends)):
+                line = data[start:end]
+                self.walls[i, :len(line)] = ~(
+                    (line == ord(" ")) | (line == ord("A")) | (line == ord("B"))
+                )
+
+        self.start = self.cell(int(np.flatnonzero(data == ord("A"))[0]), starts)
+        self.goal = self.cell(int(np.flatnonzero(data == ord("B"))[0]), starts)
+        self.solution = None
+        self.distances = None
+
+
+    def cell(self, offset, starts):
+        """(row, column) of a byte offset into the file."""
+        row = int(np.searchsorted(starts, offset, side="right")) - 1
+        return (row, offset - int(starts[row]))
+
+
+    def index(self, state):
+        """Flat index of a (row, column) cell in the padded walls."""
+        return (state[0] + 1) * (self.width + 2) + state[1] + 1
+
+
+    def distance_field(self, source=None, goal=None, compact=False):
+        """
+        Returns the number of steps from `source` (default: the start) to
+        every cell, as an array shaped like the maze with UNREACHED for
+        walls and cells that cannot be reached.
+
+        If `goal` is given, stops once the wavefront reaches it.
+
+        If `compact` is true, the field holds steps modulo 3 in one byte
+        per cell (UNREACHED_MOD3 if unreached) instead of four; that is
+        still enough to walk down it, since neighboring cells are never
+        more than one step apart.
+        """
+        source = self.start if source is None else source
+        stride = self.width + 2
+        open_cells = ~self.padded.ravel()
+        if compact:
+            field = np.full(open_cells.shape, UNREACHED_MOD3, dtype=np.uint8)
+        else:
+            field = np.full(open_cells.shape, UNREACHED, dtype=np.int32)
+        unreached = UNREACHED_MOD3 if compact else UNREACHED
+        target = self.index(goal) if goal is not None else None
+
+        frontier = np.array([self.index(source)], dtype=np.intp)
+        field[frontier] = 0
+        steps = 0
+        while len(frontier) and (target is None or field[target] == unreached):
+            steps += 1
+            value = steps % 3 if compact else steps
+
+            # Step the frontier one direction at a time, marking cells as
+            # they are reached, so no cell joins the next frontier twice
+            reached = []
+            for offset in [-stride, stride, -1, 1]:
+                candidates = frontier + offset
+                candidates = candidates[
+                    open_cells[candidates] & (field[candidates] == unreached)
+                ]
+                field[candidates] = value
+                reached.append(candidates)
+            frontier = np.concatenate(reached)
+
+        return field.reshape(self.padded.shape)[1:-1, 1:-1]
+
+
+    def solve(self):
+        """Finds a solution to maze, if one exists."""
+        field = self.distance_field(goal=self.goal, compact=True)
+        self.distances = field
+        self.num_explored = int(np.count_nonzero(field != UNREACHED_MOD3))
+
+        row, col = self.goal
+        if field[row, col] == UNREACHED_MOD3:
+            raise Exception("no solution")
+
+        # Walk down the field from the goal; a neighbor one step closer to
+        # the start is the only one holding the previous value modulo 3
+        moves = [
+            ("down", -1, 0), ("up", 1, 0), ("right", 0, -1), ("left", 0, 1)
+        ]
+        actions = []
+        cells = []
+        while (row, col) != self.start:
+            previous = (int(field[row, col]) - 1) % 3
+            for action, dr, dc in moves:
+                r, c = row + dr, col + dc
+                if 0 <= r < self.height and 0 <= c < self.width and field[r, c] == previous:
+                    actions.append(action)
+                    cells.append((row, col))
+                    row, col = r, c
+                    break
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python gridmaze.py maze.txt")
+
+    m = GridMaze(sys.argv[1])
+    print(f"Maze: {m.height} x {m.width}")
+    print("Solving...")
+    m.solve()
+    print("States Explored:", m.num_explored)
+    print("Solution length:", len(m.solution[0]))
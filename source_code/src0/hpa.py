@@ -0,0 +1,307 @@
+"""
+Hierarchical pathfinding (HPA*) for many queries on one large maze.
+
+The grid is cut into square clusters. Wherever two neighboring clusters
+share a run of open cells along their border, the run becomes an
+entrance with one or two transitions (pairs of cells facing each other
+across the border). The abstract graph links the two cells of each
+transition at cost 1, and links the transition cells inside each
+cluster by their shortest distance within that cluster.
+
+A query connects the start and goal to the transition cells of their
+clusters, runs A* over the abstract graph, then refines each abstract
+edge into cells with a search inside one cluster. Paths are close to,
+but not always exactly, the shortest.
+
+The abstract graph only depends on the walls, so it is saved as JSON
+next to the maze and reused by later runs while the walls are unchanged.
+Maze.solve("hpa") uses it through Maze.abstract_graph(), which also
+keeps it on the Maze until the walls change.
+"""
+import hashlib
+import json
+import os
+import sys
+from collections import deque
+
+from maze import MOVES, Maze, Node, PriorityFrontier
+
+VERSION = 1
+
+# Side of the square clusters, in cells
+CLUSTER_SIZE = 16
+
+# Entrances at least this long get a transition at each end, shorter
+# ones a single transition in the middle
+LONG_ENTRANCE = 6
+
+
+class AbstractGraph():
+    def __init__(self, cluster_size, height, width, digest, edges):
+        self.cluster_size = cluster_size
+        self.height = height
+        self.width = width
+
+        # Hash of the walls the graph was built from
+        self.digest = digest
+
+        # Maps each transition cell to a dict of {cell: cost}
+        self.edges = edges
+
+        # Transition cells of each cluster, keyed by cluster bounds
+        self.clusters = {}
+        for state in edges:
+            self.clusters.setdefault(self.bounds(state), []).append(state)
+
+    def bounds(self, state):
+        """(top, left, bottom, right) bounds of the cluster of a cell."""
+        size = self.cluster_size
+        top = state[0] // size * size
+        left = state[1] // size * size
+        return (top, left, min(top + size, self.height), min(left + size, self.width))
+
+
+def walls_digest(maze):
+    """Hash of a maze's walls, used to tell whether a saved graph is stale."""
+    digest = hashlib.sha1(f"{maze.height}x{maze.width}".encode())
+    for row in maze.walls:
+        digest.update(bytes(row))
+    return digest.hexdigest()
+
+
+def build_abstract_graph(maze, cluster_size=CLUSTER_SIZE):
+    """
+    Builds the AbstractGraph of a maze: finds the transitions on every
+    cluster border, then the distances between transitions within each
+    cluster.
+    """
+    edges = {}
+
+    def add_edge(a, b, cost):
+        edges.setdefault(a, {})
+        edges.setdefault(b, {})
+        if b not in edges[a] or cost < edges[a][b]:
+            edges[a][b] = cost
+            edges[b][a] = cost
+
+    # Borders between vertically stacked clusters, then side by side ones;
+    # each border is scanned in runs of cells open on both sides
+    borders = []
+    for row in range(cluster_size, maze.height, cluster_size):
+        for left in range(0, maze.width, cluster_size):
+            cells = range(left, min(left + cluster_size, maze.width))
+            borders.append([((row - 1, col), (row, col)) for col in cells])
+    for col in range(cluster_size, maze.width, cluster_size):
+        for top in range(0, maze.height, cluster_size):
+            cells = range(top, min(top + cluster_size, maze.height))
+            borders.append([((row, col - 1), (row, col)) for row in cells])
+
+    for border in borders:
+        run = []
+        for a, b in border + [(None, None)]:
+            if a is not None and maze.walkable(a) and maze.walkable(b):
+                run.append((a, b))
+                continue
+            if len(run) >= LONG_ENTRANCE:
+                transitions = [run[0], run[-1]]
+            elif run:
+                transitions = [run[len(run) // 2]]
+            else:
+                transitions = []
+            for a_cell, b_cell in transitions:
+                add_edge(a_cell, b_cell, 1)
+            run = []
+
+    # Distances between the transitions of each cluster
+    graph = AbstractGraph(cluster_size, maze.height, maze.width, walls_digest(maze), edges)
+    for bounds, states in graph.clusters.items():
+        for state in states:
+            distances = cluster_distances(maze, state, bounds)
+            for other in states:
+                if other != state and other in distances:
+                    add_edge(state, other, distances[other])
+
+    return graph
+
+
+def cluster_distances(maze, source, bounds):
+    """
+    Returns a dict of the distance from source to each cell it can reach
+    without leaving the cluster bounds.
+    """
+    top, left, bottom, right = bounds
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        state = queue.popleft()
+        for _, (r, c) in maze.neighbors(state):
+            if top <= r < bottom and left <= c < right and (r, c) not in distances:
+                distances[(r, c)] = distances[state] + 1
+                queue.append((r, c))
+    return distances
+
+
+def cluster_path(maze, source, target, bounds):
+    """
+    Returns the (actions, cells) of a shortest path from source to target
+    within the cluster bounds, or None if there is none.
+    """
+    top, left, bottom, right = bounds
+    parents = {source: None}
+    queue = deque([source])
+    while queue:
+        state = queue.popleft()
+        if state == target:
+            actions = []
+            cells = []
+            while parents[state] is not None:
+                action, previous = parents[state]
+                actions.append(action)
+                cells.append(state)
+                state = previous
+            actions.reverse()
+            cells.reverse()
+            return actions, cells
+        for action, (r, c) in maze.neighbors(state):
+            if top <= r < bottom and left <= c < right and (r, c) not in parents:
+                parents[(r, c)] = (action, state)
+                queue.append((r, c))
+    return None
+
+
+def graph_path(filename):
+    return f"{filename}.hpa.json"
+
+
+def save_abstract_graph(graph, filename):
+    """
+    Writes an AbstractGraph to a JSON file, replacing it atomically.
+    """
+    data = {
+        "version": VERSION,
+        "cluster_size": graph.cluster_size,
+        "height": graph.height,
+        "width": graph.width,
+        "digest": graph.digest,
+        "edges": [
+            [state[0], state[1], [[o[0], o[1], cost] for o, cost in others.items()]]
+            for state, others in graph.edges.items()
+        ]
+    }
+    with open(f"{filename}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{filename}.tmp", filename)
+
+
+def load_abstract_graph(filename, maze, cluster_size=CLUSTER_SIZE):
+    """
+    Reads an AbstractGraph written by save_abstract_graph, or returns None
+    if there is none, or it was built for other walls or cluster size.
+    """
+    try:
+        with open(filename) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (data.get("version") != VERSION or data["cluster_size"] != cluster_size
+            or data["digest"] != walls_digest(maze)):
+        return None
+    edges = {
+        (row, col): {(r, c): cost for r, c, cost in others}
+        for row, col, others in data["edges"]
+    }
+    return AbstractGraph(cluster_size, data["height"], data["width"], data["digest"], edges)
+
+
+def abstract_graph_for(maze, filename, cluster_size=CLUSTER_SIZE):
+    """
+    Returns the AbstractGraph of the maze loaded from filename, reading
+    it from the saved copy if still valid, and building and saving it
+    otherwise. A graph that cannot be saved (say, in a read-only
+    directory) is still returned.
+    """
+    path = graph_path(filename)
+    graph = load_abstract_graph(path, maze, cluster_size)
+    if graph is None:
+        graph = build_abstract_graph(maze, cluster_size)
+        try:
+            save_abstract_graph(graph, path)
+        except OSError:
+            pass
+    return graph
+
+
+def solve(maze, graph):
+    """
+    Finds a solution to maze, if one exists, by A* over the abstract
+    graph and refinement within clusters. Sets maze.solution, and counts
+    the abstract nodes expanded in maze.num_explored and maze.explored.
+    """
+    start, goal = maze.start, maze.goal
+
+    # Connect the start and goal to the transitions of their clusters
+    extra = {start: {}, goal: {}}
+    for state in [start, goal]:
+        bounds = graph.bounds(state)
+        distances = cluster_distances(maze, state, bounds)
+        for other in graph.clusters.get(bounds, []) + [start, goal]:
+            if other != state and other in distances and graph.bounds(other) == bounds:
+                extra[state][other] = distances[other]
+                extra.setdefault(other, {})[state] = distances[other]
+
+    def neighbors(state):
+        result = dict(graph.edges.get(state, {}))
+        result.update(extra.get(state, {}))
+        return result.items()
+
+    maze.num_explored = 0
+    maze.explored = set()
+    frontier = PriorityFrontier()
+    node = Node(state=start, parent=None, action=None)
+    frontier.add(node, maze.priority(node, "astar"))
+    while True:
+        if frontier.empty():
+            raise Exception("no solution")
+        node = frontier.remove()
+        maze.num_explored += 1
+        if node.state == goal:
+            break
+        maze.explored.add(node.state)
+        for state, cost in neighbors(node.state):
+            if state not in maze.explored:
+                child = Node(state=state, parent=node, action=None, cost=node.cost + cost)
+                frontier.add(child, maze.priority(child, "astar"))
+
+    # Refine each abstract edge into cells: a step across a border, or a
+    # path inside the cluster both ends belong to
+    states = []
+    while node is not None:
+        states.append(node.state)
+        node = node.parent
+    states.reverse()
+
+    actions = []
+    cells = []
+    for a, b in zip(states, states[1:]):
+        if graph.bounds(a) == graph.bounds(b):
+            segment_actions, segment_cells = cluster_path(maze, a, b, graph.bounds(a))
+            actions.extend(segment_actions)
+            cells.extend(segment_cells)
+        else:
+            for action, (dr, dc) in MOVES.items():
+                if (a[0] + dr, a[1] + dc) == b:
+                    actions.append(action)
+                    cells.append(b)
+    maze.solution = (actions, cells)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python hpa.py maze.txt")
+
+    m = Maze(sys.argv[1])
+    print("Abstract nodes:", len(m.abstract_graph().edges))
+    print("Solving...")
+    m.solve("hpa")
+    print("States Explored:", m.num_explored)
+    print("Solution length:", len(m.solution[0]))
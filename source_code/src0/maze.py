@@ -1,10 +1,30 @@
+import heapq
 import sys
+from collections import deque
+
+# Search algorithms that Maze.solve can run
+ALGORITHMS = ["dfs", "bfs", "greedy", "astar", "jps", "bidirectional", "junctions", "tree", "hpa"]
+
+# (row, column) step taken by each action
+MOVES = {
+    "up": (-1, 0),
+    "down": (1, 0),
+    "left": (0, -1),
+    "right": (0, 1)
+}
+
+# Action for each (row, column) step
+ACTIONS = {move: action for action, move in MOVES.items()}
+
+# Action that undoes each action
+OPPOSITE = {"up": "down", "down": "up", "left": "right", "right": "left"}
 
 class Node():
-    def __init__(self, state, parent, action):
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
+        self.cost = cost
 
 
 class StackFrontier():
@@ -39,9 +59,49 @@ class QueueFrontier(StackFrontier):
             self.frontier = self.frontier[1:]
             return node
 
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that removes the node with the lowest priority first,
+    kept in a binary heap. Adding a state that is already in the
+    frontier only replaces it if the new priority is lower.
+    """
+
+    def __init__(self):
+        self.frontier = []
+        self.priorities = {}
+        self.count = 0
+
+    def add(self, node, priority=0):
+        if node.state in self.priorities and self.priorities[node.state] <= priority:
+            return
+        self.priorities[node.state] = priority
+
+        # The counter breaks ties in insertion order, so nodes are never compared
+        heapq.heappush(self.frontier, (priority, self.count, node))
+        self.count += 1
+
+    def contains_state(self, state):
+        return state in self.priorities
+
+    def empty(self):
+        return len(self.priorities) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        while True:
+            priority, _, node = heapq.heappop(self.frontier)
+
+            # Skip entries replaced by a lower priority since being added
+            if self.priorities.get(node.state) == priority:
+                del self.priorities[node.state]
+                return node
+
 class Maze():
 
     def __init__(self, filename):
+        self.filename = filename
 
         # Read file and set height and width of maze
         with open(filename) as f:
@@ -79,6 +139,49 @@ class Maze():
             self.walls.append(row)
 
         self.solution = None
+        self.reset_caches()
+
+
+    def reset_caches(self):
+        """Sets every search cache to empty."""
+
+        # Junction graph cached by compress(), with the cells left open
+        # after filling dead ends and the cell each filled one hangs from
+        self.junctions = None
+        self.live = None
+        self.filled = None
+
+        # Breadth-first tree cached by distance_tree(), with its source
+        self.tree = None
+        self.tree_source = None
+        self.tree_explored = 0
+
+        # HPA* abstract graph cached by abstract_graph()
+        self.hpa_graph = None
+
+
+    def is_wall(self, row, col):
+        """
+        Whether the cell at (row, col), which must be inside the maze, is
+        a wall. All searches read walls through this.
+        """
+        return self.walls[row][col]
+
+
+    def set_wall(self, state, wall=True):
+        """Adds or removes a wall, dropping any search state cached for the old walls."""
+        row, col = state
+        self.walls[row][col] = wall
+        self.invalidate()
+
+
+    def invalidate(self):
+        """
+        Drops the junction graph, distance tree and abstract graph cached
+        for the current walls; code that changes self.walls directly must
+        call this.
+        """
+        self.reset_caches()
 
 
     def print(self):
@@ -111,21 +214,73 @@ class Maze():
 
         result = []
         for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
+            if 0 <= r < self.height and 0 <= c < self.width and not self.is_wall(r, c):
                 result.append((action, (r, c)))
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def heuristic(self, state):
+        """Manhattan distance from a state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+
+    def priority(self, node, algorithm):
+        """
+        Priority of a node in the frontier: the heuristic alone for greedy
+        best-first search, and path cost plus heuristic for A*, with ties
+        broken towards the node closer to the goal.
+        """
+        h = self.heuristic(node.state)
+        if algorithm == "greedy":
+            return h
+        return (node.cost + h, h)
+
+
+    def solve(self, algorithm="dfs"):
+        """
+        Finds a solution to maze, if one exists, using one of ALGORITHMS:
+        depth-first search, breadth-first search, greedy best-first search
+        or A* search (both guided by the Manhattan distance to the goal),
+        or Jump Point Search (see solve_jps), or breadth-first search from
+        both ends (see solve_bidirectional), or A* over the junction graph
+        (see solve_junctions), or a lookup in the cached breadth-first tree
+        from the start (see distance_tree), or hierarchical A* over the
+        cached abstract graph (see abstract_graph).
+        """
+        if algorithm not in ALGORITHMS:
+            raise Exception(f"unknown algorithm: {algorithm}")
+        if algorithm == "jps":
+            return self.solve_jps()
+        if algorithm == "bidirectional":
+            return self.solve_bidirectional()
+        if algorithm == "junctions":
+            return self.solve_junctions()
+        if algorithm == "tree":
+            self.solution = self.path_to(self.goal)
+            self.num_explored = self.tree_explored
+            if self.solution is None:
+                raise Exception("no solution")
+            return
+        if algorithm == "hpa":
+            import hpa
+            return hpa.solve(self, self.abstract_graph())
+        informed = algorithm in ["greedy", "astar"]
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        frontier.add(start)
+        if algorithm == "dfs":
+            frontier = StackFrontier()
+        elif algorithm == "bfs":
+            frontier = QueueFrontier()
+        else:
+            frontier = PriorityFrontier()
+        if informed:
+            frontier.add(start, self.priority(start, algorithm))
+        else:
+            frontier.add(start)
 
         # Initialize an empty explored set
         self.explored = set()
@@ -159,71 +314,520 @@ class Maze():
 
             # Add neighbors to frontier
             for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
+                if state in self.explored:
+                    continue
+                child = Node(state=state, parent=node, action=action, cost=node.cost + 1)
+
+                # A priority frontier keeps the cheaper of two paths to a state
+                if informed:
+                    frontier.add(child, self.priority(child, algorithm))
+                elif not frontier.contains_state(state):
                     frontier.add(child)
 
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
+    def walkable(self, state):
+        row, col = state
+        return 0 <= row < self.height and 0 <= col < self.width and not self.is_wall(row, col)
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
 
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
+    def jump(self, state, action):
+        """
+        Moves from state in the direction of action until reaching the goal
+        or a jump point: a cell where an optimal path may turn, because a
+        side opens up next to a wall. Returns that cell, or None if a wall
+        comes first.
+        """
+        dr, dc = MOVES[action]
+        row, col = state
+        while True:
+            row, col = row + dr, col + dc
+            if not self.walkable((row, col)):
+                return None
+            if (row, col) == self.goal:
+                return (row, col)
+
+            # Moving sideways, a forced neighbor is an open cell above or
+            # below whose own neighbor behind us is a wall
+            if dc != 0:
+                for side in [-1, 1]:
+                    if (self.walkable((row + side, col))
+                            and not self.walkable((row + side, col - dc))):
+                        return (row, col)
+
+            # Moving vertically, also stop where a sideways jump finds one
+            else:
+                for side in [-1, 1]:
+                    if (self.walkable((row, col + side))
+                            and not self.walkable((row - dr, col + side))):
+                        return (row, col)
+                if (self.jump((row, col), "left") is not None
+                        or self.jump((row, col), "right") is not None):
+                    return (row, col)
+
+
+    def jump_actions(self, node):
+        """
+        Directions to jump in from a node: every direction from the start,
+        and otherwise straight on or to either side, never back.
+        """
+        if node.parent is None:
+            return list(MOVES)
+        if node.action in ["left", "right"]:
+            return [node.action, "up", "down"]
+        return [node.action, "left", "right"]
+
+
+    def solve_jps(self):
+        """
+        Finds a solution to maze, if one exists, with Jump Point Search:
+        A* over jump points only, skipping the many equally short paths
+        through open areas. Only jump points count as explored states.
+        """
+        self.num_explored = 0
+        self.explored = set()
 
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
+        start = Node(state=self.start, parent=None, action=None)
+        frontier = PriorityFrontier()
+        frontier.add(start, self.priority(start, "astar"))
 
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
+        while True:
+            if frontier.empty():
+                raise Exception("no solution")
 
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+            node = frontier.remove()
+            self.num_explored += 1
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+            # Expand the straight segments between jump points into cells
+            if node.state == self.goal:
+                actions = []
+                cells = []
+                while node.parent is not None:
+                    dr, dc = MOVES[node.action]
+                    state = node.state
+                    while state != node.parent.state:
+                        actions.append(node.action)
+                        cells.append(state)
+                        state = (state[0] - dr, state[1] - dc)
+                    node = node.parent
+                actions.reverse()
+                cells.reverse()
+                self.solution = (actions, cells)
+                return
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+            self.explored.add(node.state)
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+            for action in self.jump_actions(node):
+                state = self.jump(node.state, action)
+                if state is None or state in self.explored:
+                    continue
+                cost = node.cost + abs(state[0] - node.state[0]) + abs(state[1] - node.state[1])
+                child = Node(state=state, parent=node, action=action, cost=cost)
+                frontier.add(child, self.priority(child, "astar"))
+
+
+    def solve_bidirectional(self):
+        """
+        Finds a solution to maze, if one exists, with breadth-first search
+        from the start and the goal at once, a whole level at a time from
+        whichever side has the smaller frontier, until the two meet.
+        """
+        self.num_explored = 0
+        self.explored = set()
+
+        # Map each reached state to the (action, state) that reached it
+        forward = {self.start: None}
+        backward = {self.goal: None}
+        forward_frontier = [self.start]
+        backward_frontier = [self.goal]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_level(forward_frontier, forward, backward)
+            else:
+                backward_frontier, meeting = self.expand_level(backward_frontier, backward, forward)
+            if meeting is not None:
+                break
+        else:
+            raise Exception("no solution")
+
+        # Walk back from the meeting point to the start
+        actions = []
+        cells = []
+        state = meeting
+        while forward[state] is not None:
+            action, previous = forward[state]
+            actions.append(action)
+            cells.append(state)
+            state = previous
+        actions.reverse()
+        cells.reverse()
+
+        # Then on to the goal, undoing the actions the goal side took
+        state = meeting
+        while backward[state] is not None:
+            action, state = backward[state]
+            actions.append(OPPOSITE[action])
+            cells.append(state)
+        self.solution = (actions, cells)
+
+
+    def expand_level(self, frontier, parents, other_parents):
+        """
+        Explores every state in frontier, recording newly reached states in
+        parents. Returns the next frontier and the first state the other
+        side has already reached, or None if the two have not met.
+        """
+        next_frontier = []
+        for state in frontier:
+            self.num_explored += 1
+            self.explored.add(state)
+            for action, neighbor in self.neighbors(state):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (action, state)
+                if neighbor in other_parents:
+                    return next_frontier, neighbor
+                next_frontier.append(neighbor)
+        return next_frontier, None
+
+
+    def fill_dead_ends(self):
+        """
+        Repeatedly fills in dead ends (open cells with at most one open
+        neighbor) until only cycles and the corridors between them are
+        left. The filled cells form trees hanging from the open cells.
+
+        Returns the set of open cells left, and a dict mapping each filled
+        cell to the neighbor it hangs from: the one still open when it was
+        filled, or None for the last cell filled in a component with no
+        cycle. Neither depends on the start or goal.
+        """
+        degree = {}
+        for i in range(self.height):
+            for j in range(self.width):
+                if not self.is_wall(i, j):
+                    degree[(i, j)] = len(self.neighbors((i, j)))
+
+        dead_ends = [cell for cell in degree if degree[cell] <= 1]
+        filled = {}
+        while dead_ends:
+            cell = dead_ends.pop()
+            if cell in filled:
+                continue
+            filled[cell] = None
+            for _, neighbor in self.neighbors(cell):
+                if neighbor not in filled:
+                    filled[cell] = neighbor
+                    degree[neighbor] -= 1
+                    if degree[neighbor] <= 1:
+                        dead_ends.append(neighbor)
+        return {cell for cell in degree if cell not in filled}, filled
+
+
+    def live_neighbors(self, state):
+        return [(action, cell) for action, cell in self.neighbors(state) if cell in self.live]
+
+
+    def compress(self):
+        """
+        Fills dead ends and collapses the 1-wide corridors left into a
+        graph mapping each junction to a list of (junction, corridor
+        length, first action) edges. The graph only depends on the walls,
+        so it is cached until invalidate().
+        """
+        if self.junctions is not None:
+            return self.junctions
+
+        self.live, self.filled = self.fill_dead_ends()
+        self.junctions = {
+            cell: [] for cell in self.live if len(self.live_neighbors(cell)) != 2
+        }
+
+        # Follow each corridor leaving each junction to the junction at its end
+        for node, edges in self.junctions.items():
+            for action, cell in self.live_neighbors(node):
+                end, length, _ = self.follow_corridor(node, cell)
+                edges.append((end, length, action))
+        return self.junctions
+
+
+    def follow_corridor(self, state, cell, spliced=()):
+        """
+        Follows the corridor that leaves state into its neighbor cell until
+        it reaches a junction or a cell in spliced. Returns that cell, the
+        corridor length and the action that leads back along the corridor
+        from it.
+        """
+        previous = state
+        length = 1
+        while cell not in self.junctions and cell not in spliced:
+            for _, following in self.live_neighbors(cell):
+                if following != previous:
+                    break
+            previous, cell = cell, following
+            length += 1
+        return cell, length, ACTIONS[(previous[0] - cell[0], previous[1] - cell[1])]
+
+
+    def hanging_path(self, state):
+        """
+        Returns the cells from state up the tree of filled dead ends it is
+        in, to the open cell the tree hangs from (or to its last filled
+        cell if it has none). Just [state] if state was not filled.
+        """
+        path = [state]
+        while self.filled.get(path[-1]) is not None:
+            path.append(self.filled[path[-1]])
+        return path
+
+
+    def solve_junctions(self):
+        """
+        Finds a solution to maze, if one exists, with the junction graph
+        from compress(). The start and goal first climb out of the dead
+        ends they are in; if they are in the same tree, the path just
+        meets where their climbs do, and otherwise A* runs over the
+        junction graph between the open cells they reach. Only junctions
+        count as explored states; corridors are expanded back into cells
+        once the goal is found.
+        """
+        self.compress()
+        self.num_explored = 0
+        self.explored = set()
+
+        up = self.hanging_path(self.start)
+        down = self.hanging_path(self.goal)
+        if up[-1] == down[-1]:
+            climbed = set(up)
+            meet = next(cell for cell in down if cell in climbed)
+            up = up[:up.index(meet) + 1]
+            down = down[:down.index(meet) + 1]
+            middle = []
+        elif up[-1] in self.live and down[-1] in self.live:
+            middle = self.search_junctions(up[-1], down[-1])
+        else:
+            middle = None
+        if middle is None:
+            raise Exception("no solution")
+
+        cells = up[1:] + middle + down[-2::-1]
+        actions = [
+            ACTIONS[(cell[0] - previous[0], cell[1] - previous[1])]
+            for previous, cell in zip([self.start] + cells, cells)
+        ]
+        self.solution = (actions, cells)
+
+
+    def search_junctions(self, source, target):
+        """
+        Returns the cells after source on a shortest path to target, both
+        open cells left by fill_dead_ends(), by A* over the junction
+        graph; or None if there is none.
+
+        A source or target inside a corridor is spliced into it, with
+        edges to and from the junctions at both ends kept apart from the
+        cached graph, so they are dropped once the search is done.
+        """
+        junctions = self.compress()
+        spliced = {}
+        for state in [source, target]:
+            if state in junctions or state in spliced:
+                continue
+            spliced[state] = []
+            for action, cell in self.live_neighbors(state):
+                end, length, back = self.follow_corridor(state, cell, spliced)
+                spliced[state].append((end, length, action))
+                spliced.setdefault(end, []).append((state, length, back))
+
+        def heuristic(state):
+            return abs(state[0] - target[0]) + abs(state[1] - target[1])
+
+        start = Node(state=source, parent=None, action=None)
+        frontier = PriorityFrontier()
+        frontier.add(start, (heuristic(source), heuristic(source)))
+
+        while not frontier.empty():
+            node = frontier.remove()
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
+
+            if node.state == target:
+                edges = []
+                while node.parent is not None:
+                    edges.append((node.parent.state, node.action, node.state))
+                    node = node.parent
+                cells = []
+                for state, action, end in reversed(edges):
+                    cells.extend(self.walk_corridor(state, action, end))
+                return cells
+
+            self.explored.add(node.state)
+
+            for state, length, action in junctions.get(node.state, []) + spliced.get(node.state, []):
+                if state in self.explored:
+                    continue
+                child = Node(state=state, parent=node, action=action, cost=node.cost + length)
+                h = heuristic(state)
+                frontier.add(child, (child.cost + h, h))
+        return None
+
+
+    def walk_corridor(self, state, action, end):
+        """
+        Returns the cells of the corridor that leaves state by action and
+        runs to end.
+        """
+        dr, dc = MOVES[action]
+        previous, cell = state, (state[0] + dr, state[1] + dc)
+        cells = [cell]
+        while cell != end:
+            for _, following in self.live_neighbors(cell):
+                if following != previous:
+                    break
+            previous, cell = cell, following
+            cells.append(cell)
+        return cells
+
+
+    def distance_tree(self, source=None):
+        """
+        Returns a breadth-first tree of every cell reachable from source
+        (default: the start) as two flat lists indexed by row * width +
+        column: each cell's parent index and its distance, both -1 for
+        cells not reached. The tree is cached until the walls change or
+        a tree from another source is asked for.
+        """
+        source = self.start if source is None else source
+        if self.tree is not None and self.tree_source == source:
+            return self.tree
+
+        parents = [-1] * (self.height * self.width)
+        distances = [-1] * (self.height * self.width)
+        index = source[0] * self.width + source[1]
+        parents[index] = index
+        distances[index] = 0
+
+        queue = deque([source])
+        self.explored = set()
+        while queue:
+            state = queue.popleft()
+            self.explored.add(state)
+            index = state[0] * self.width + state[1]
+            for _, (r, c) in self.neighbors(state):
+                neighbor = r * self.width + c
+                if distances[neighbor] == -1:
+                    parents[neighbor] = index
+                    distances[neighbor] = distances[index] + 1
+                    queue.append((r, c))
+
+        self.tree = (parents, distances)
+        self.tree_source = source
+        self.tree_explored = len(self.explored)
+        return self.tree
+
+
+    def path_to(self, goal, source=None):
+        """
+        Returns the (actions, cells) of a shortest path from source
+        (default: the start) to goal, or None if there is none. Only the
+        first call for a source searches; later ones walk the cached tree
+        in time proportional to the path length.
+        """
+        parents, distances = self.distance_tree(source)
+        index = goal[0] * self.width + goal[1]
+        if distances[index] == -1:
+            return None
+
+        actions = []
+        cells = []
+        while parents[index] != index:
+            parent = parents[index]
+            row, col = divmod(index, self.width)
+            parent_row, parent_col = divmod(parent, self.width)
+            for action, (dr, dc) in MOVES.items():
+                if (parent_row + dr, parent_col + dc) == (row, col):
+                    actions.append(action)
+                    break
+            cells.append((row, col))
+            index = parent
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+
+    def abstract_graph(self):
+        """
+        Returns the HPA* abstract graph of the maze (see hpa.py), cached
+        until the walls change. It is read from the copy saved next to the
+        maze file if that is still valid, and built and saved otherwise.
+        """
+        if self.hpa_graph is None:
+            import hpa
+            self.hpa_graph = hpa.abstract_graph_for(self, self.filename)
+        return self.hpa_graph
+
+
+    def wall_mask(self):
+        """NumPy boolean array of the walls."""
+        import numpy as np
+        return np.array(self.walls, dtype=bool).reshape(self.height, self.width)
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        """
+        Draws the maze to an image file: every cell is colored from the
+        wall, solution and explored masks at once, then scaled up to a
+        cell_size square with a black cell_border around it.
+        """
+        import numpy as np
+        from PIL import Image
+
+        colors = np.array([
+            (237, 240, 252, 255),   # Empty cell
+            (212, 97, 85, 255),     # Explored
+            (220, 235, 113, 255),   # Solution
+            (0, 171, 28, 255),      # Goal
+            (255, 0, 0, 255),       # Start
+            (40, 40, 40, 255),      # Walls
+            (0, 0, 0, 255),         # Border
+        ], dtype=np.uint8)
+
+        # Color of each cell, later layers drawn over earlier ones
+        cells = np.zeros((self.height, self.width), dtype=np.uint8)
+        if self.solution is not None and show_explored and self.explored:
+            rows, cols = zip(*self.explored)
+            cells[rows, cols] = 1
+        if self.solution is not None and show_solution and self.solution[1]:
+            rows, cols = zip(*self.solution[1])
+            cells[rows, cols] = 2
+        cells[self.goal] = 3
+        cells[self.start] = 4
+        cells[self.wall_mask()] = 5
+
+        # Scale each cell up to a square, with pixels outside
+        # [cell_border, cell_size - cell_border] in both directions black
+        offsets = np.arange(cell_size)
+        border = (offsets < cell_border) | (offsets > cell_size - cell_border)
+        pixels = np.repeat(np.repeat(cells, cell_size, axis=0), cell_size, axis=1)
+        pixels[np.tile(border, self.height), :] = 6
+        pixels[:, np.tile(border, self.width)] = 6
+
+        Image.fromarray(colors[pixels], "RGBA").save(filename)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3]:
+        sys.exit(f"Usage: python maze.py maze.txt [{'|'.join(ALGORITHMS)}]")
+    algorithm = sys.argv[2] if len(sys.argv) == 3 else "dfs"
+
+    m = Maze(sys.argv[1])
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(algorithm)
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)